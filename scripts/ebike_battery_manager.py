@@ -2,39 +2,64 @@
 
 import asyncio
 from kasa import Discover, SmartDevice
-import smtplib
-from email.message import EmailMessage
 from datetime import datetime, timedelta
 import logging
+import logging.handlers
+import queue
+import threading
 import argparse
-from typing import Set, Union, ForwardRef, Dict, List, Optional
-from os.path import isfile
+from typing import Set, Union, ForwardRef, Dict, List, Optional, Collection, Tuple, FrozenSet, TYPE_CHECKING
+from stat import S_ISREG
+import os
 from enum import Enum
 import configparser
 import traceback
 from math import ceil
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import atexit
 import signal
 import sys
-import inspect
 import bisect
+import re
+import json
+from time import monotonic
+import random
+try:
+    # optional, a faster event loop when it is installed, see get_event_loop()
+    import uvloop
+except ImportError:
+    uvloop = None
+
+if TYPE_CHECKING:
+    # smtplib and email are only imported when a report is mailed, see SmtpPool and send_my_mail
+    import smtplib
+    from email.message import EmailMessage
 
 # Constants
 CLOSE_MISS_PCT = 0.05
 CLOSE_MISS_MAX = 3
 BATTERY_PREFIX = 'battery_'
 RETRY_DELAY_SECS = 60 * 2
+RETRY_DELAY_MAX_SECS = 60 * 5
 SETTLE_TIME_SECS = 30
 PLUG_SETTLE_TIME_SECS = 10
+PLUG_RETRY_SETUP_DELAY_MAX_SECS = 30
+PLUG_POWER_POLL_TIMEOUT_SECS = 5.0
+PLUG_POWER_POLL_INITIAL_SECS = 0.5
+PLUG_POWER_POLL_MAX_SECS = 2.0
 COARSE_PROBE_INTERVAL_SECS = 10 * 60
 FINE_PROBE_INTERVAL_SECS = 5 * 60
+MAX_PROBE_INTERVAL_SECS = 30 * 60
+PROBE_BACKOFF_MULTIPLIER = 1.5
+PROBE_BACKOFF_HEADROOM_FACTOR = 3.0
+PROBE_SCHEDULE_SLACK_SECS = 30
 COARSE_PROBE_THRESHOLD_MARGIN = 20.0
 MAX_CYCLES_IN_FINE_MODE = 20
 MINIMUM_AMP_THRESHOLD_FOR_ACTIVE_CHARGE = 0.03
 CONFIG_PLUGS_SECTION = 'Plugs'
 CONFIG_STORAGE_SECTION = 'Storage'
 CONFIG_FULL_CHARGE_SECTION = 'FullCharge'
+RESERVED_CONFIG_SECTIONS = frozenset((CONFIG_PLUGS_SECTION, CONFIG_STORAGE_SECTION, CONFIG_FULL_CHARGE_SECTION))
 DEFAULT_CONFIG_TAG = 'DEFAULT'
 NOMINAL_START_THRESHOLD_TAG = 'nominal_charge_start_power_threshold'
 NOMINAL_STOP_THRESHOLD_TAG = 'nominal_charge_stop_power_threshold'
@@ -63,6 +88,18 @@ PLUG_RETRY_SETUP_LIMIT = 3
 MAX_RUNTIME_HOURS_DEFAULT = 12
 DEFAULT_BATTERY_VOLTAGE = 48.0
 CHARGER_EFFICIENCY = 0.75
+MAX_CONCURRENT_KASA_RPCS_DEFAULT = 8
+UPDATE_COALESCE_WINDOW_SECS = 1.0
+LOG_FILE_BUFFER_SIZE = 1 << 16
+LOG_FLUSH_TIMEOUT_SECS = 5
+DEVICE_HOST_CACHE_SUFFIX = '.hosts'
+DEVICE_PROBE_TIMEOUT_SECS = 3
+DISCOVERY_PACKETS = 3
+DISCOVERY_TIMEOUT_SECS = 5
+SMTP_HOST = 'smtp.gmail.com'
+SMTP_PORT = 587
+EMAIL_INLINE_LOG_MAX_BYTES = 1 << 20
+EMAIL_INLINE_LOG_TAIL_BYTES = 1 << 16
 CUSTOM_LEVEL_NUM = 25
 CUSTOM_LEVEL_NAME = "CUSTOM"
 
@@ -71,9 +108,6 @@ CUSTOM_LEVEL_NAME = "CUSTOM"
 MANDATORY_CONFIG_MANUFACTURER_TAGS = [FULL_CHARGE_THRESHOLD_TAG, COARSE_PROBE_THRESHOLD_MARGIN_TAG]
 ONE_OF_CONFIG_MANUFACTURER_TAGS = [NOMINAL_START_THRESHOLD_TAG, NOMINAL_STOP_THRESHOLD_TAG]
 
-def fn_name():
-    return inspect.currentframe().f_back.f_code.co_name
-
 def sigint_handler(signal, frame):
     print("SIGINT received")
     sys.exit(0)
@@ -95,261 +129,94 @@ class BatteryManagerState:
     '''
     _instance = None
 
-    _full_charge_repeat_limit: int
-    _fine_probe_interval_secs: int
-    _probe_interval_secs: int
-    _max_cycles_in_fine_mode: int
-    _force_full_charge: bool
-    _max_hours_to_run: int
-    _storage_charge_cycle_limit: int
-    _analyze_first_entry: bool
-    _quiet_mode: bool
-    _logging_mode: "LoggingMode"
-    _default_config: "DeviceConfig"
-    _device_config: Dict[str, "DeviceConfig"]
-    _plug_manufacturer_map: Dict[str, str]
-    _battery_plug_list: List[Union["BatteryPlug", "BatteryStripPlug"]]
-    _plug_storage_list: List[str]
-    _plug_full_charge_list: List[str]
-    _active_plugs: Set["ActivePlug"]
-    _scan_for_battery_prefix: bool
-    _nominal_charge_start_power_threshold: float
-    _nominal_charge_stop_power_threshold: float
-    _full_charge_power_threshold: float
-    _storage_charge_start_power_threshold: float
-    _storage_charge_stop_power_threshold: float
-    _log_file: str
-    _debug_file_logger_active: bool
+    # plain state lives directly in slots, no property wrappers
+    __slots__ = ('full_charge_repeat_limit', 'fine_probe_interval_secs', 'probe_interval_secs',
+                 'max_cycles_in_fine_mode', 'force_full_charge', 'max_hours_to_run', 'storage_charge_cycle_limit',
+                 'analyze_first_entry', 'quiet_mode', 'logging_mode', 'default_config', 'device_config',
+                 'plug_manufacturer_map', 'battery_plug_list', '_plug_storage_list', '_plug_full_charge_list',
+                 'active_plugs', 'scan_for_battery_prefix', 'nominal_charge_start_power_threshold',
+                 'nominal_charge_stop_power_threshold', 'full_charge_power_threshold',
+                 'storage_charge_start_power_threshold', 'storage_charge_stop_power_threshold', 'log_file',
+                 'debug_file_logger_active', 'max_concurrent_kasa_rpcs', 'device_host_cache_file', 'verified_config')
+    full_charge_repeat_limit: int
+    fine_probe_interval_secs: int
+    probe_interval_secs: int
+    max_cycles_in_fine_mode: int
+    force_full_charge: bool
+    max_hours_to_run: int
+    storage_charge_cycle_limit: int
+    analyze_first_entry: bool
+    quiet_mode: bool
+    logging_mode: "LoggingMode"
+    default_config: "DeviceConfig"
+    device_config: Dict[str, "DeviceConfig"]
+    plug_manufacturer_map: Dict[str, str]
+    battery_plug_list: List[Union["BatteryPlug", "BatteryStripPlug"]]
+    _plug_storage_list: FrozenSet[str]
+    _plug_full_charge_list: FrozenSet[str]
+    active_plugs: Dict[str, "ActivePlug"]
+    scan_for_battery_prefix: bool
+    nominal_charge_start_power_threshold: float
+    nominal_charge_stop_power_threshold: float
+    full_charge_power_threshold: float
+    storage_charge_start_power_threshold: float
+    storage_charge_stop_power_threshold: float
+    log_file: str
+    debug_file_logger_active: bool
+    max_concurrent_kasa_rpcs: int
+    device_host_cache_file: Optional[str]
+    verified_config: Optional[Tuple[Tuple, Tuple]]
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance._full_charge_repeat_limit = FULL_CHARGE_REPEAT_LIMIT
-            cls._instance._fine_probe_interval_secs = FINE_PROBE_INTERVAL_SECS
-            cls._instance._probe_interval_secs = COARSE_PROBE_INTERVAL_SECS
-            cls._instance._max_cycles_in_fine_mode = MAX_CYCLES_IN_FINE_MODE
-            cls._instance._force_full_charge = False
-            cls._instance._max_hours_to_run = MAX_RUNTIME_HOURS_DEFAULT
-            cls._instance._storage_charge_cycle_limit = STORAGE_CHARGE_CYCLE_LIMIT_DEFAULT
-            cls._instance._battery_plug_list = []
-            cls._instance._device_config = {}
-            cls._instance._plug_manufacturer_map = {}
-            cls._instance._plug_storage_list = []
-            cls._instance._plug_full_charge_list = []
-            cls._instance._analyze_first_entry = True
-            cls._instance._quiet_mode = False
-            cls._instance._logging_mode = LoggingMode.SUPER_QUIET
-            cls._instance._default_config = None
-            cls._instance._active_plugs = set()
-            cls._scan_for_battery_prefix = False
-            cls._nominal_charge_start_power_threshold = NOMINAL_CHARGE_START_THRESHOLD_DEFAULT
-            cls._nominal_charge_stop_power_threshold = NOMINAL_CHARGE_STOP_THRESHOLD_DEFAULT
-            cls._full_charge_power_threshold = FULL_CHARGE_THRESHOLD_DEFAULT
-            cls._storage_charge_start_power_threshold = STORAGE_CHARGE_START_THRESHOLD_DEFAULT
-            cls._storage_charge_stop_power_threshold = STORAGE_CHARGE_STOP_THRESHOLD_DEFAULT
-            cls._log_file = DEFAULT_LOG_FILE
-            cls._debug_file_logger_active = False
+            cls._instance.full_charge_repeat_limit = FULL_CHARGE_REPEAT_LIMIT
+            cls._instance.fine_probe_interval_secs = FINE_PROBE_INTERVAL_SECS
+            cls._instance.probe_interval_secs = COARSE_PROBE_INTERVAL_SECS
+            cls._instance.max_cycles_in_fine_mode = MAX_CYCLES_IN_FINE_MODE
+            cls._instance.force_full_charge = False
+            cls._instance.max_hours_to_run = MAX_RUNTIME_HOURS_DEFAULT
+            cls._instance.storage_charge_cycle_limit = STORAGE_CHARGE_CYCLE_LIMIT_DEFAULT
+            cls._instance.battery_plug_list = []
+            cls._instance.device_config = {}
+            cls._instance.plug_manufacturer_map = {}
+            cls._instance._plug_storage_list = frozenset()
+            cls._instance._plug_full_charge_list = frozenset()
+            cls._instance.analyze_first_entry = True
+            cls._instance.quiet_mode = False
+            cls._instance.logging_mode = LoggingMode.SUPER_QUIET
+            cls._instance.default_config = None
+            cls._instance.active_plugs = {}
+            cls._instance.scan_for_battery_prefix = False
+            cls._instance.nominal_charge_start_power_threshold = NOMINAL_CHARGE_START_THRESHOLD_DEFAULT
+            cls._instance.nominal_charge_stop_power_threshold = NOMINAL_CHARGE_STOP_THRESHOLD_DEFAULT
+            cls._instance.full_charge_power_threshold = FULL_CHARGE_THRESHOLD_DEFAULT
+            cls._instance.storage_charge_start_power_threshold = STORAGE_CHARGE_START_THRESHOLD_DEFAULT
+            cls._instance.storage_charge_stop_power_threshold = STORAGE_CHARGE_STOP_THRESHOLD_DEFAULT
+            cls._instance.log_file = DEFAULT_LOG_FILE
+            cls._instance.debug_file_logger_active = False
+            cls._instance.max_concurrent_kasa_rpcs = MAX_CONCURRENT_KASA_RPCS_DEFAULT
+            cls._instance.device_host_cache_file = None
+            cls._instance.verified_config = None
         return cls._instance
 
+    # the plug name sets keep their setters, which normalize any collection to a frozenset
     @property
-    def full_charge_repeat_limit(self) -> int:
-        return self._full_charge_repeat_limit
-    
-    @full_charge_repeat_limit.setter
-    def full_charge_repeat_limit(self, limit: int)  -> None:
-        self._full_charge_repeat_limit = limit
-
-    @property
-    def fine_probe_interval_secs(self) -> int:
-        return self._fine_probe_interval_secs
-    
-    @fine_probe_interval_secs.setter
-    def fine_probe_interval_secs(self, seconds: int) -> None:
-        self._fine_probe_interval_secs = seconds
-
-    @property
-    def probe_interval_secs(self) -> int:
-        return self._probe_interval_secs
-    
-    @probe_interval_secs.setter
-    def probe_interval_secs(self, seconds: int) -> None:
-        self._probe_interval_secs = seconds
-
-    @property
-    def max_cycles_in_fine_mode(self) -> int:
-        return self._max_cycles_in_fine_mode
-    
-    @max_cycles_in_fine_mode.setter
-    def max_cycles_in_fine_mode(self, cycles: int) -> None:
-        self._max_cycles_in_fine_mode = cycles
-
-    @property
-    def force_full_charge(self) -> bool:
-        return self._force_full_charge
-    
-    @force_full_charge.setter
-    def force_full_charge(self, force_full_charge: bool) -> None:
-        self._force_full_charge = force_full_charge
-
-    @property
-    def max_hours_to_run(self) -> int:
-        return self._max_hours_to_run
-    
-    @max_hours_to_run.setter
-    def max_hours_to_run(self, hours: int) -> None:
-        self._max_hours_to_run = hours
-
-    @property
-    def storage_charge_cycle_limit(self) -> int:
-        return self._storage_charge_cycle_limit
-    
-    @storage_charge_cycle_limit.setter
-    def storage_charge_cycle_limit(self, cycle_limit: int) -> None:
-        self._storage_charge_cycle_limit = cycle_limit
-
-    @property
-    def analyze_first_entry(self) -> bool:
-        return self._analyze_first_entry
-    
-    @analyze_first_entry.setter
-    def analyze_first_entry(self, first: bool) -> None:
-        self._analyze_first_entry = first
-
-    @property
-    def quiet_mode(self) -> bool:
-        return self._quiet_mode
-    
-    @quiet_mode.setter
-    def quiet_mode(self, _quiet_mode: bool) -> None:
-        self._quiet_mode = _quiet_mode
-
-    @property
-    def logging_mode(self) -> "LoggingMode":
-        return self._logging_mode
-    
-    @logging_mode.setter
-    def logging_mode(self, _logging_mode: "LoggingMode") -> None:
-        self._logging_mode = _logging_mode
-
-    @property
-    def default_config(self) -> "DeviceConfig":
-        return self._default_config
-    
-    @default_config.setter
-    def default_config(self, config: "DeviceConfig") -> None:
-        self._default_config = config
-
-    @property
-    def device_config(self) -> Dict[str, "DeviceConfig"]:
-        return self._device_config
-    
-    @device_config.setter
-    def device_config(self, map: Dict[str, "DeviceConfig"]) -> None:
-        self._device_config = map
-    
-    @property
-    def plug_manufacturer_map(self) -> Dict[str, str]:
-        return self._plug_manufacturer_map
-    
-    @plug_manufacturer_map.setter
-    def plug_manufacturer_map(self, map: Dict[str, str]) -> None:
-        self._plug_manufacturer_map = map
-    
-    @property
-    def battery_plug_list(self) -> List[Union["BatteryPlug", "BatteryStripPlug"]]:
-        return self._battery_plug_list
-
-    @battery_plug_list.setter
-    def battery_plug_list(self, list: List[Union["BatteryPlug", "BatteryStripPlug"]]) -> None:
-        self._battery_plug_list = list
-    
-    @property
-    def plug_storage_list(self) -> List[str]:
+    def plug_storage_list(self) -> FrozenSet[str]:
         return self._plug_storage_list
 
     @plug_storage_list.setter
-    def plug_storage_list(self, list: List[str]) -> None:
-        self._plug_storage_list = list
+    def plug_storage_list(self, plug_names: Collection[str]) -> None:
+        # stored as a frozenset so the per plug membership checks hash instead of scanning
+        self._plug_storage_list = frozenset(plug_names)
 
     @property
-    def plug_full_charge_list(self) -> List[str]:
+    def plug_full_charge_list(self) -> FrozenSet[str]:
         return self._plug_full_charge_list
 
     @plug_full_charge_list.setter
-    def plug_full_charge_list(self, list: List[str]) -> None:
-        self._plug_full_charge_list = list    
-
-    @property
-    def active_plugs(self) -> Set["ActivePlug"]:
-        return self._active_plugs
-
-    @active_plugs.setter
-    def active_plugs(self, plugs: Set["ActivePlug"]) -> None:
-        self._active_plugs = plugs    
-
-    @property
-    def scan_for_battery_prefix(self) -> bool:
-        return self._scan_for_battery_prefix
-    
-    @scan_for_battery_prefix.setter
-    def scan_for_battery_prefix(self, _scan_for_battery_prefix) -> None:
-        self._scan_for_battery_prefix = _scan_for_battery_prefix
-
-    @property
-    def nominal_charge_start_power_threshold(self) -> float:
-        return self._nominal_charge_start_power_threshold
-    
-    @nominal_charge_start_power_threshold.setter
-    def nominal_charge_start_power_threshold(self, _nominal_charge_start_power_threshold) -> None:
-        self._nominal_charge_start_power_threshold = _nominal_charge_start_power_threshold
-
-    @property
-    def nominal_charge_stop_power_threshold(self) -> float:
-        return self._nominal_charge_stop_power_threshold
-    
-    @nominal_charge_stop_power_threshold.setter
-    def nominal_charge_stop_power_threshold(self, _nominal_charge_stop_power_threshold) -> None:
-        self._nominal_charge_stop_power_threshold = _nominal_charge_stop_power_threshold
-
-    @property
-    def full_charge_power_threshold(self) -> float:
-        return self._full_charge_power_threshold
-    
-    @full_charge_power_threshold.setter
-    def full_charge_power_threshold(self, _full_charge_power_threshold) -> None:
-        self._full_charge_power_threshold = _full_charge_power_threshold
-
-    @property
-    def storage_charge_start_power_threshold(self) -> float:
-        return self._storage_charge_start_power_threshold
-    
-    @storage_charge_start_power_threshold.setter
-    def storage_charge_start_power_threshold(self, _storage_charge_start_power_threshold) -> None:
-        self._storage_charge_start_power_threshold = _storage_charge_start_power_threshold
-
-    @property
-    def storage_charge_stop_power_threshold(self) -> float:
-        return self._storage_charge_stop_power_threshold
-    
-    @storage_charge_stop_power_threshold.setter
-    def storage_charge_stop_power_threshold(self, _storage_charge_stop_power_threshold) -> None:
-        self._storage_charge_stop_power_threshold = _storage_charge_stop_power_threshold
-
-    @property
-    def log_file(self) -> str:
-        return self._log_file
-    
-    @log_file.setter
-    def log_file(self, _log_file) -> None:
-        self._log_file = _log_file
-
-    @property
-    def debug_file_logger_active(self) -> bool:
-        return self._debug_file_logger_active
-    
-    @debug_file_logger_active.setter
-    def debug_file_logger_active(self, _debug_file_logger_active: bool) -> None:
-        self._debug_file_logger_active = _debug_file_logger_active
+    def plug_full_charge_list(self, plug_names: Collection[str]) -> None:
+        self._plug_full_charge_list = frozenset(plug_names)
 
 
 class CustomLogger(logging.Logger):
@@ -370,34 +237,33 @@ class DebugLogger(CustomLogger):
         super().__init__(name, level)
         self._active = active
         self._debug_logger = CustomLogger('start_threshold_logger')
-        self._debug_logger_formatter = logging.Formatter('THRESHOLD: %(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        self._debug_logger_file_handler = logging.FileHandler(INVESTIGATE_START_CURRENT_FILE)
-        self._debug_logger_file_handler.setFormatter(self._debug_logger_formatter)
-        self._debug_logger_file_handler.setLevel(level)
-        self._debug_logger.addHandler(self._debug_logger_file_handler)
         self._debug_logger.setLevel(level)
+        # INVESTIGATE_START_CURRENT_FILE is only opened when the debug file logger is enabled
+        if active:
+            self._debug_logger_formatter = logging.Formatter('THRESHOLD: %(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            self._debug_logger_file_handler = logging.FileHandler(INVESTIGATE_START_CURRENT_FILE)
+            self._debug_logger_file_handler.setFormatter(self._debug_logger_formatter)
+            self._debug_logger_file_handler.setLevel(level)
+            self._debug_logger.addHandler(self._debug_logger_file_handler)
 
 
-    def info(self, msg: str) -> None:
+    def info(self, msg: str, *args) -> None:
         if self._active:
-            self._debug_logger.info(msg)
+            self._debug_logger.info(msg, *args)
 
-    def error(self, msg: str) -> None:
+    def error(self, msg: str, *args) -> None:
         if self._active:
-            self._debug_logger.error(msg)
+            self._debug_logger.error(msg, *args)
 
 # logging setup for special debug logger and normal logger
 start_threshold_logger = None
 logger = None
 
+@dataclass(slots=True, eq=False)
 class ActivePlug():
     plug: "BatteryPlug"
     start_time: datetime
-    stop_time: datetime = None
-
-    def __init__(self, plug: "BatteryPlug", start_time: datetime):
-        self.plug = plug
-        self.start_time = start_time
+    stop_time: Optional[datetime] = None
 
 
 class AnalyzeException(Exception):
@@ -424,7 +290,7 @@ class LoggingMode(Enum):
     NOISY       = 4
 
 
-@dataclass
+@dataclass(slots=True)
 class DeviceConfig():
     '''
     Device/Manufacturer specific threshold values
@@ -446,10 +312,87 @@ class DeviceConfig():
     charger_max_hours_to_run: int
     battery_voltage: Optional[float] = DEFAULT_BATTERY_VOLTAGE
     charger_efficiency: Optional[float] = CHARGER_EFFICIENCY
+    # Derived in __post_init__, the stop and start thresholds keyed by BatteryChargeMode
+    stop_thresholds: Dict[BatteryChargeMode, float] = field(init=False, repr=False, compare=False)
+    start_thresholds: Dict[BatteryChargeMode, float] = field(init=False, repr=False, compare=False)
 
     def __post_init__(self):
         if self.battery_voltage is None:
             self.battery_voltage = DEFAULT_BATTERY_VOLTAGE
+        self.stop_thresholds = {
+            BatteryChargeMode.NOMINAL: self.nominal_charge_stop_power_threshold,
+            BatteryChargeMode.FULL: self.full_charge_power_threshold,
+            BatteryChargeMode.STORAGE: self.storage_charge_stop_power_threshold
+        }
+        self.start_thresholds = {
+            BatteryChargeMode.NOMINAL: self.nominal_charge_start_power_threshold,
+            BatteryChargeMode.FULL: self.full_charge_power_threshold,
+            BatteryChargeMode.STORAGE: self.storage_charge_start_power_threshold
+        }
+
+# Bounds the number of in flight kasa RPCs, see get_kasa_semaphore()
+_kasa_sem: Optional[asyncio.Semaphore] = None
+_kasa_sem_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_kasa_semaphore() -> asyncio.Semaphore:
+    '''
+    Returns the semaphore that bounds concurrent kasa device RPCs (update/turn_on/turn_off).
+    Created lazily because a semaphore is tied to the event loop it is first used on,
+    a new one is created whenever the running loop changes.
+
+    Returns:
+        asyncio.Semaphore: semaphore sized by max_concurrent_kasa_rpcs
+    '''
+    global _kasa_sem, _kasa_sem_loop
+    loop = asyncio.get_running_loop()
+    if _kasa_sem is None or _kasa_sem_loop is not loop:
+        _kasa_sem = asyncio.Semaphore(BatteryManagerState().max_concurrent_kasa_rpcs)
+        _kasa_sem_loop = loop
+    return _kasa_sem
+
+
+# Shared in flight update() per device and when each device was last refreshed, see update_device()
+_inflight_updates: Dict[SmartDevice, asyncio.Task] = {}
+_last_update_times: Dict[SmartDevice, float] = {}
+
+
+async def _update_device_rpc(smart_device: SmartDevice) -> None:
+    async with get_kasa_semaphore():
+        await smart_device.update()
+    _last_update_times[smart_device] = monotonic()
+
+
+async def update_device(smart_device: SmartDevice, force: bool = False) -> None:
+    '''
+    Refreshes a kasa device.  Concurrent callers for the same device share a single request,
+    which matters for strips where every child BatteryStripPlug refreshes the same device,
+    and a device refreshed within UPDATE_COALESCE_WINDOW_SECS is not refreshed again.
+
+    Args:
+        smart_device (SmartDevice): device to refresh
+        force (bool, optional): always issue a new request, required after changing the device state. Defaults to False.
+    '''
+    loop = asyncio.get_running_loop()
+    if not force:
+        last_update = _last_update_times.get(smart_device)
+        if last_update is not None and monotonic() - last_update < UPDATE_COALESCE_WINDOW_SECS:
+            return
+        inflight = _inflight_updates.get(smart_device)
+        if inflight is not None and not inflight.done() and inflight.get_loop() is loop:
+            # shield so a cancelled caller does not cancel the request for the others
+            await asyncio.shield(inflight)
+            return
+    task = loop.create_task(_update_device_rpc(smart_device))
+    _inflight_updates[smart_device] = task
+
+    def clear_inflight(done_task: asyncio.Task) -> None:
+        if _inflight_updates.get(smart_device) is done_task:
+            del _inflight_updates[smart_device]
+
+    task.add_done_callback(clear_inflight)
+    await asyncio.shield(task)
+
 
 def kw_h_to_amp_hours(kw_h: float, battery_voltage: float) -> float:
         watt_hours: float = kw_h * 1000
@@ -461,6 +404,11 @@ class BatteryPlug():
     '''
     This class supports the TP-Link KP115 Smart Plug
     '''
+    __slots__ = ('name', 'device', 'battery_found', 'charge_threshold_passed', 'charge_threshold_close_misses',
+                 'full_charge_repeat_count', 'full_charge_repeat_limit', 'max_cycles_in_fine_mode', 'fine_mode_active',
+                 'storage_charge_cycle_limit', '_config', 'battery_charge_mode', 'battery_charge_start_time',
+                 'battery_charge_stop_time', 'initial_amp_hours', 'total_amp_hours', 'probe_interval_secs',
+                 'next_probe_at', '_active_threshold', '_start_threshold', '_approximate_threshold', '_coarse_probe_threshold', '_backoff_headroom')
     name: str
     device: SmartDevice
     battery_found: bool
@@ -477,8 +425,18 @@ class BatteryPlug():
     battery_charge_stop_time: datetime
     initial_amp_hours: float
     total_amp_hours: float
-
-    def __init__(self, name: str, device: SmartDevice, max_cycles_in_fine_mode: int, config: DeviceConfig):
+    probe_interval_secs: int
+    # monotonic() time this plug is next due for a probe, None when due now
+    next_probe_at: Optional[float]
+    # Derived from config and battery_charge_mode, see refresh_thresholds()
+    _active_threshold: float
+    _start_threshold: float
+    _approximate_threshold: float
+    _coarse_probe_threshold: float
+    _backoff_headroom: float
+
+    def __init__(self, name: str, device: SmartDevice, max_cycles_in_fine_mode: int, config: DeviceConfig,
+                 now: Optional[datetime] = None):
         self.name = name
         self.device = device
         self.battery_found = False
@@ -489,24 +447,48 @@ class BatteryPlug():
         self.fine_mode_active = False
         self.storage_charge_cycle_limit = config.storage_charge_cycle_limit
         self.max_cycles_in_fine_mode = max_cycles_in_fine_mode
-        self.config = config
         self.battery_charge_mode = BatteryChargeMode.NOMINAL
-        self.battery_charge_start_time = datetime.now()
+        self.config = config
+        self.battery_charge_start_time = now or datetime.now()
         self.battery_charge_stop_time = self.battery_charge_start_time + timedelta(hours=config.charger_max_hours_to_run)
         self.total_amp_hours = 0.0
+        self.probe_interval_secs = COARSE_PROBE_INTERVAL_SECS
+        self.next_probe_at = None
+
+    @property
+    def config(self) -> DeviceConfig:
+        return self._config
+
+    @config.setter
+    def config(self, config: DeviceConfig) -> None:
+        self._config = config
+        self.refresh_thresholds()
+
+    def refresh_thresholds(self) -> None:
+        '''
+        Precomputes the thresholds used on every probe so the analyze hot path is a plain attribute read.
+        Must be called whenever config or battery_charge_mode changes, the config setter and
+        set_battery_charge_mode already do this.
+        '''
+        config = self._config
+        self._active_threshold = config.stop_thresholds[self.battery_charge_mode]
+        self._start_threshold = config.start_thresholds[self.battery_charge_mode]
+        self._approximate_threshold = self._active_threshold + (self._active_threshold * CLOSE_MISS_PCT)
+        self._coarse_probe_threshold = self._active_threshold + config.coarse_probe_threshold_margin
+        self._backoff_headroom = PROBE_BACKOFF_HEADROOM_FACTOR * config.coarse_probe_threshold_margin
 
-    async def update(self) -> None:
-        await self.device.update()
+    async def update(self, force: bool = False) -> None:
+        await update_device(self.device, force)
 
     async def reset_emeter_state(self) -> None:
-        logger.info(f'{fn_name()}: {self.name}: today: {str(self.device.emeter_today)} kwH')
+        logger.info('reset_emeter_state: %s: today: %s kwH', self.name, self.device.emeter_today)
         self.initial_amp_hours = kw_h_to_amp_hours(self.device.emeter_today, self.config.battery_voltage)
-        logger.info(f"BatteryPlug.{fn_name()}: {self.name}: initial_amp_hours: {str(self.initial_amp_hours)}")
+        logger.info('BatteryPlug.reset_emeter_state: %s: initial_amp_hours: %s', self.name, self.initial_amp_hours)
         self.total_amp_hours = 0.0
 
     def get_power_total(self) -> float:
         amp_hours = kw_h_to_amp_hours(self.device.emeter_today, self.config.battery_voltage)
-        # logger.info(f'{fn_name()}: kw_h: {str(self.device.emeter_today)}, amp_hours: {str(amp_hours)}')
+        # logger.info('get_power_total: kw_h: %s, amp_hours: %s', self.device.emeter_today, amp_hours)
         if self.initial_amp_hours < 0 or self.initial_amp_hours > amp_hours:
             self.initial_amp_hours = 0
         self.total_amp_hours = amp_hours - self.initial_amp_hours
@@ -521,7 +503,7 @@ class BatteryPlug():
             float: power in watts
         '''
         power: float = self.device.emeter_realtime.power
-        logger.info(f'{fn_name()}: {str(power)}')
+        logger.info('get_power: %s', power)
         return power
 
     def is_on(self) -> bool:
@@ -542,27 +524,15 @@ class BatteryPlug():
         Returns:
             float: Appropriate power threshold the charger must drop below as a stopping condition
         '''
-        match self.battery_charge_mode:
-            case BatteryChargeMode.NOMINAL:
-                return self.config.nominal_charge_stop_power_threshold
-            case BatteryChargeMode.FULL:
-                return self.config.full_charge_power_threshold
-            case BatteryChargeMode.STORAGE:
-                return self.config.storage_charge_stop_power_threshold
+        return self._active_threshold
 
     def get_start_power_threshold(self) -> float:
         '''
         Returns the appropriate power threshold that the charger must draw in order
         to enter the repsective charge mode
         '''
-        match self.battery_charge_mode:
-            case BatteryChargeMode.NOMINAL:
-                return self.config.nominal_charge_start_power_threshold
-            case BatteryChargeMode.STORAGE:
-                return self.config.storage_charge_start_power_threshold
-            case BatteryChargeMode.FULL:
-                return self.config.full_charge_power_threshold
-                        
+        return self._start_threshold
+
     def check_full_charge(self) -> bool:
         '''
         Checks and determines if we have reached a stopping point
@@ -574,7 +544,7 @@ class BatteryPlug():
         Returns:
             bool: True if full charge is complete
         '''
-        # logger.info(f'{self.name} - check_full_charge: battery_charge_mode: {str(self.battery_charge_mode)}, charge_threshold_passed: {str(self.charge_threshold_passed)}')
+        # logger.info('%s - check_full_charge: battery_charge_mode: %s, charge_threshold_passed: %s', self.name, self.battery_charge_mode.name, self.charge_threshold_passed)
         if self.battery_charge_mode == BatteryChargeMode.FULL:
             if self.charge_threshold_passed:
                 self.full_charge_repeat_count = self.full_charge_repeat_count + 1
@@ -582,7 +552,7 @@ class BatteryPlug():
             else:
                 if self.fine_mode_active:
                     self.max_cycles_in_fine_mode = self.max_cycles_in_fine_mode - 1
-                    # logger.info(f'{self.name} - check_full_charge: plug.max_cycles_in_fine_mode: {str(self.max_cycles_in_fine_mode)}')
+                    # logger.info('%s - check_full_charge: plug.max_cycles_in_fine_mode: %s', self.name, self.max_cycles_in_fine_mode)
                     return self.max_cycles_in_fine_mode <= 0
         return self.charge_threshold_passed
 
@@ -590,10 +560,10 @@ class BatteryPlug():
         '''
         returns True if a plug's battery is in storage mode AND it's cycle limit has counted down to 0
         '''
-        # logger.info(f'check_storage_mode: ENTRY: battery_charge_mode: {str(self.battery_charge_mode)}, cycle_limit: {str(self.get_storage_charge_cycle_limit())}')
+        # logger.info('check_storage_mode: ENTRY: battery_charge_mode: %s, cycle_limit: %s', self.battery_charge_mode.name, self.storage_charge_cycle_limit)
         if self.battery_charge_mode == BatteryChargeMode.STORAGE:
             logger.info(
-                f'check_storage_mode: plug.get_storage_charge_cycle_limit(): {str(self.get_storage_charge_cycle_limit())}')
+                'check_storage_mode: plug.get_storage_charge_cycle_limit(): %s', self.storage_charge_cycle_limit)
             if self.get_and_decrement_storage_charge_cycle_limit() == 0:
                 self.charge_threshold_passed = True
                 # logger.info(f'check_storage_mode: return True')
@@ -632,13 +602,11 @@ class BatteryPlug():
         if self.charge_threshold_passed:
             return True
         if self.battery_charge_mode == BatteryChargeMode.FULL:
-            approximate_threshold = self.get_active_charge_battery_power_threshold(
-            ) + (self.get_active_charge_battery_power_threshold() * CLOSE_MISS_PCT)
-            if device_power_consumption < approximate_threshold:
+            if device_power_consumption < self._approximate_threshold:
                 self.charge_threshold_close_misses = self.charge_threshold_close_misses + 1
             self.charge_threshold_passed = self.charge_threshold_close_misses > CLOSE_MISS_MAX
             return self.charge_threshold_passed
-        if device_power_consumption < self.get_active_charge_battery_power_threshold():
+        if device_power_consumption < self._active_threshold:
             self.charge_threshold_passed = True
             return True
         return False
@@ -650,16 +618,34 @@ class BatteryPlug():
         Returns:
             float: computed coarse_probe_threshold
         '''
-        match self.battery_charge_mode:
-            case BatteryChargeMode.NOMINAL:
-                return self.config.nominal_charge_stop_power_threshold + self.config.coarse_probe_threshold_margin
-            case BatteryChargeMode.FULL:
-                return self.config.full_charge_power_threshold + self.config.coarse_probe_threshold_margin
-            case BatteryChargeMode.STORAGE:
-                return self.config.storage_charge_stop_power_threshold + self.config.coarse_probe_threshold_margin
+        return self._coarse_probe_threshold
+
+    def update_probe_interval(self, device_power_consumption: float, fine_probe_interval_secs: int) -> int:
+        '''
+        Adapts how long this plug can wait before the next probe.
+        In fine mode the plug is probed every fine_probe_interval_secs.
+        While the power draw is well above the stop threshold the interval backs off by
+        PROBE_BACKOFF_MULTIPLIER up to MAX_PROBE_INTERVAL_SECS, otherwise it is COARSE_PROBE_INTERVAL_SECS.
+
+        Args:
+            device_power_consumption (float): latest power reading in watts
+            fine_probe_interval_secs (int): current fine probe interval
+
+        Returns:
+            int: probe interval in seconds for this plug
+        '''
+        if self.fine_mode_active:
+            self.probe_interval_secs = fine_probe_interval_secs
+        elif device_power_consumption - self._active_threshold > self._backoff_headroom:
+            self.probe_interval_secs = min(
+                int(self.probe_interval_secs * PROBE_BACKOFF_MULTIPLIER), MAX_PROBE_INTERVAL_SECS)
+        else:
+            self.probe_interval_secs = COARSE_PROBE_INTERVAL_SECS
+        return self.probe_interval_secs
 
     def set_battery_charge_mode(self, mode: BatteryChargeMode):
         self.battery_charge_mode = mode
+        self.refresh_thresholds()
 
     def get_storage_charge_cycle_limit(self) -> int:
         return self.storage_charge_cycle_limit
@@ -679,22 +665,37 @@ class BatteryPlug():
             self.storage_charge_cycle_limit = self.storage_charge_cycle_limit - 1
         return current_storage_charge_cycle_limit
 
-    async def turn_on(self) -> Union[None, BatteryPlugException]:
-        await self.device.turn_on()
-        await self.device.update()
-        if not self.device.is_on:
-            logger.error(f"FATAL ERROR, unable to turn on plug: {self.name}")
+    async def switch(self, on: bool) -> None:
+        '''
+        Sends the on/off request only, the device state is stale until the device is refreshed.
+        See turn_on(), turn_off() and turn_off_plugs()
+        '''
+        async with get_kasa_semaphore():
+            if on:
+                await self.device.turn_on()
+            else:
+                await self.device.turn_off()
+
+    def check_switched(self, on: bool) -> Union[None, BatteryPlugException]:
+        if on and not self.device.is_on:
+            logger.error("FATAL ERROR, unable to turn on plug: %s", self.name)
             raise BatteryPlugException(
                 f'FATAL ERROR, unable to turn on plug: {self.name}')
-
-    async def turn_off(self) -> Union[None, BatteryPlugException]:
-        await self.device.turn_off()
-        await self.device.update()
-        if not self.device.is_off:
-            logger.error(f"FATAL ERROR, unable to turn off plug: {self.name}")
+        if not on and not self.device.is_off:
+            logger.error("FATAL ERROR, unable to turn off plug: %s", self.name)
             raise BatteryPlugException(
                 f'FATAL ERROR, unable to turn off plug: {self.name}')
 
+    async def turn_on(self) -> Union[None, BatteryPlugException]:
+        await self.switch(True)
+        await update_device(self.device, force=True)
+        self.check_switched(True)
+
+    async def turn_off(self) -> Union[None, BatteryPlugException]:
+        await self.switch(False)
+        await update_device(self.device, force=True)
+        self.check_switched(False)
+
     def get_device(self) -> SmartDevice:
         return self.device
     
@@ -703,31 +704,47 @@ class BatteryStripPlug(BatteryPlug):
     '''
     This class subclasses BatteryPlug and supports the TP-Link HS300 SmartStrip plugs
     '''
+    __slots__ = ('plug_index', '_child_plug')
     plug_index: int
+    _child_plug: Optional[SmartDevice]
 
-    def __init__(self, name: str, device: SmartDevice, plug_index: int, max_cycles_in_fine_mode: int, thresholds: DeviceConfig):
-        super().__init__(name, device, max_cycles_in_fine_mode, thresholds)
+    def __init__(self, name: str, device: SmartDevice, plug_index: int, max_cycles_in_fine_mode: int, thresholds: DeviceConfig,
+                 now: Optional[datetime] = None):
+        super().__init__(name, device, max_cycles_in_fine_mode, thresholds, now)
         self.plug_index = plug_index
+        self._child_plug = None
+
+    @property
+    def child_plug(self) -> SmartDevice:
+        '''
+        The strip's child device for this plug, looked up on first use since
+        the strip only populates its children on its first update
+        '''
+        child_plug = self._child_plug
+        if child_plug is None:
+            child_plug = self._child_plug = self.device.children[self.plug_index]
+        return child_plug
 
     async def reset_emeter_state(self) -> None:
-        logger.info(f'BatteryStripPlug.{fn_name()}: {self.name}: ENTRY')
-        child_plug = self.device.children[self.plug_index]
+        logger.info('BatteryStripPlug.reset_emeter_state: %s: ENTRY', self.name)
+        child_plug = self.child_plug
         # await child_plug.erase_emeter_stats()
-        logger.info(f'BatteryStripPlug.{fn_name()}: {self.name}: today: {str(child_plug.emeter_today)} kwH')
+        logger.info('BatteryStripPlug.reset_emeter_state: %s: today: %s kwH', self.name, child_plug.emeter_today)
         self.initial_amp_hours = kw_h_to_amp_hours(child_plug.emeter_today, self.config.battery_voltage)
-        logger.info(f"BatteryStripPlug.{fn_name()}: {self.name}: initial_amp_hours: {str(self.initial_amp_hours)}")
+        logger.info('BatteryStripPlug.reset_emeter_state: %s: initial_amp_hours: %s', self.name, self.initial_amp_hours)
         self.total_amp_hours = 0.0
-        logger.info(f'BatteryStripPlug.{fn_name()}: {self.name}: EXIT')
+        logger.info('BatteryStripPlug.reset_emeter_state: %s: EXIT', self.name)
 
     def get_power_total(self) -> float:
-        child_plug = self.device.children[self.plug_index]
-        amp_hours = kw_h_to_amp_hours(child_plug.emeter_today, self.config.battery_voltage)
-        # logger.info(f'{fn_name()}: kw_h: {str(child_plug.emeter_today)}, amp_hours: {str(amp_hours)}')
-        if self.initial_amp_hours < 0 or self.initial_amp_hours > amp_hours:
-            self.initial_amp_hours = 0
-        self.total_amp_hours = amp_hours - self.initial_amp_hours
+        config = self.config
+        amp_hours = kw_h_to_amp_hours(self.child_plug.emeter_today, config.battery_voltage)
+        # logger.info('get_power_total: kw_h: %s, amp_hours: %s', self.child_plug.emeter_today, amp_hours)
+        initial_amp_hours = self.initial_amp_hours
+        if initial_amp_hours < 0 or initial_amp_hours > amp_hours:
+            initial_amp_hours = self.initial_amp_hours = 0
+        total_amp_hours = self.total_amp_hours = amp_hours - initial_amp_hours
         # logger.info(f"plug: {self.name}, actual amp hours: {self.total_amp_hours}, CHARGER_EFFICIENCY: {self.config.charger_efficiency}, estimated battery amp hours: {self.total_amp_hours * CHARGER_EFFICIENCY}")
-        return self.total_amp_hours * self.config.charger_efficiency
+        return total_amp_hours * config.charger_efficiency
 
     def get_power(self) -> float:
         '''
@@ -736,36 +753,65 @@ class BatteryStripPlug(BatteryPlug):
         Returns:
             float: power in watts
         '''
-        child_plug = self.device.children[self.plug_index]
-        power: float = child_plug.emeter_realtime.power
-        logger.info(f'BatteryStripPlug.get_power: {str(power)}')
+        power: float = self.child_plug.emeter_realtime.power
+        logger.info('BatteryStripPlug.get_power: %s', power)
         return power
 
     def is_on(self) -> bool:
-        child_plug = self.device.children[self.plug_index]
-        return child_plug.is_on
+        return self.child_plug.is_on
 
-    async def turn_on(self) -> Union[None, BatteryPlugException]:
-        child_plug = self.device.children[self.plug_index]
-        await child_plug.turn_on()
-        await self.update()
-        if not child_plug.is_on:
+    async def switch(self, on: bool) -> None:
+        child_plug = self.child_plug
+        async with get_kasa_semaphore():
+            if on:
+                await child_plug.turn_on()
+            else:
+                await child_plug.turn_off()
+
+    def check_switched(self, on: bool) -> Union[None, BatteryPlugException]:
+        child_plug = self.child_plug
+        if on and not child_plug.is_on:
             logger.error(
-                f"FATAL ERROR, unable to turn on plug: {child_plug.name}")
+                "FATAL ERROR, unable to turn on plug: %s", child_plug.name)
             raise BatteryPlugException(
                 f'FATAL ERROR, unable to turn on plug: {child_plug.name}')
-
-    async def turn_off(self) -> Union[None, BatteryPlugException]:
-        child_plug = self.device.children[self.plug_index]
-        await child_plug.turn_off()
-        await self.update()
-        if not child_plug.is_off:
+        if not on and not child_plug.is_off:
             logger.error(
-                f"FATAL ERROR, unable to turn off plug: {child_plug.name}")
+                "FATAL ERROR, unable to turn off plug: %s", child_plug.name)
             raise BatteryPlugException(
                 f'FATAL ERROR, unable to turn off plug: {child_plug.name}')
 
 
+async def turn_off_plugs(plugs: List[BatteryPlug]) -> List[Optional[Exception]]:
+    '''
+    Turns several plugs off, sending all the requests first and then refreshing each device once.
+    Children of the same strip share one refresh instead of one per child.
+
+    Args:
+        plugs (List[BatteryPlug]): plugs to turn off
+
+    Returns:
+        List[Optional[Exception]]: per plug, None if it is now off, otherwise the exception
+    '''
+    switched = await asyncio.gather(*(plug.switch(False) for plug in plugs), return_exceptions=True)
+    devices = list({plug.device: None for plug, result in zip(plugs, switched) if not isinstance(result, Exception)})
+    refreshed = await asyncio.gather(*(update_device(device, force=True) for device in devices), return_exceptions=True)
+    refresh_errors = dict(zip(devices, refreshed))
+    results: List[Optional[Exception]] = []
+    for plug, result in zip(plugs, switched):
+        if isinstance(result, Exception):
+            results.append(result)
+        elif isinstance(refresh_errors[plug.device], Exception):
+            results.append(refresh_errors[plug.device])
+        else:
+            try:
+                plug.check_switched(False)
+                results.append(None)
+            except BatteryPlugException as e:
+                results.append(e)
+    return results
+
+
 def init_argparse() -> argparse.ArgumentParser:
     '''
     Initializes ArgumentParser for command line args when the script
@@ -814,39 +860,39 @@ def init_argparse() -> argparse.ArgumentParser:
         help='reduces logging'
     )
     parser.add_argument(
-        '--nominal_start_charge_threshold', metavar='',
+        '--nominal_start_charge_threshold', metavar='', type=float,
         help='set the default start threshold power override for nominal charge start'
     )
     parser.add_argument(
-        '--nominal_charge_cutoff', metavar='',
+        '--nominal_charge_cutoff', metavar='', type=float,
         help='set the default cutoff power override for nominal charge complete'
     )
     parser.add_argument(
-        '--full_charge_repeat_limit', metavar='',
+        '--full_charge_repeat_limit', metavar='', type=int,
         help='number of cycles to repeat after attaining full charge'
     )
     parser.add_argument(
-        '--max_cycles_in_fine_mode', metavar='',
+        '--max_cycles_in_fine_mode', metavar='', type=int,
         help='max limit of cycles to prevent forever charge'
     )
     parser.add_argument(
-        '--full_charge_cutoff', metavar='',
+        '--full_charge_cutoff', metavar='', type=float,
         help='set the full power override for full charge complete'
     )
     parser.add_argument(
-        '--storage_start_charge_threshold', metavar='',
+        '--storage_start_charge_threshold', metavar='', type=float,
         help='set the storage threshold power override for storage charge start'
     )
     parser.add_argument(
-        '--storage_charge_cutoff', metavar='',
+        '--storage_charge_cutoff', metavar='', type=float,
         help='set the storage power override for storage charge complete'
     )
     parser.add_argument(
-        '--storage_charge_cycle_limit', metavar='',
+        '--storage_charge_cycle_limit', metavar='', type=int,
         help='max cycles to charge in storage charge mode, default is 1'
     )
     parser.add_argument(
-        '--max_hours_to_run', metavar='',
+        '--max_hours_to_run', metavar='', type=int,
         help='maximum time to run the script in hours'
     )
     parser.add_argument(
@@ -854,35 +900,42 @@ def init_argparse() -> argparse.ArgumentParser:
         action='store_true',
         help='enables auto scan for any plugs with a battery_ prefix'
     )
+    parser.add_argument(
+        '--max_concurrent_kasa_rpcs', metavar='', type=int,
+        help=f'max number of concurrent requests to kasa devices, default is {MAX_CONCURRENT_KASA_RPCS_DEFAULT}'
+    )
     return parser
 
 
-def create_battery_plug(plug_name: str, smart_device: SmartDevice) -> BatteryPlug:
+def create_battery_plug(plug_name: str, smart_device: SmartDevice, now: Optional[datetime] = None) -> BatteryPlug:
     '''
     Create an instance of a BatteryPlug
 
     Args:
         plug_name (str): 
         smart_device (SmartDevice): Base class of TP-Link kasa device, in this case SmartPlug superclass
+        now (Optional[datetime]): charge start time, defaults to datetime.now()
 
     Returns:
         BatteryPlug: The BatteryPlug instance will have the appropriate BatteryChargeMode set
     '''
-    plug_full_charge_list = BatteryManagerState().plug_full_charge_list
-    plug_storage_list = BatteryManagerState().plug_storage_list
+    state = BatteryManagerState()
+    plug_full_charge_list = state.plug_full_charge_list
+    plug_storage_list = state.plug_storage_list
     plug: BatteryPlug = BatteryPlug(
-        plug_name, smart_device, BatteryManagerState().max_cycles_in_fine_mode, get_device_config(plug_name))
+        plug_name, smart_device, state.max_cycles_in_fine_mode, get_device_config(plug_name), now)
     if plug_name in plug_storage_list:
         plug.set_battery_charge_mode(BatteryChargeMode.STORAGE)
     elif plug_name in plug_full_charge_list:
         plug.set_battery_charge_mode(BatteryChargeMode.FULL)
     else:
         plug.set_battery_charge_mode(
-            BatteryChargeMode.FULL if BatteryManagerState().force_full_charge else BatteryChargeMode.NOMINAL)
+            BatteryChargeMode.FULL if state.force_full_charge else BatteryChargeMode.NOMINAL)
     return plug
 
 
-def create_battery_strip_plug(plug_name: str, smart_device: SmartDevice, index: int) -> BatteryStripPlug:
+def create_battery_strip_plug(
+        plug_name: str, smart_device: SmartDevice, index: int, now: Optional[datetime] = None) -> BatteryStripPlug:
     '''
     Create an instance of a BatteryStripPlug
 
@@ -890,34 +943,28 @@ def create_battery_strip_plug(plug_name: str, smart_device: SmartDevice, index:
         plug_name (str): 
         smart_device (SmartDevice): Base class of TP-Link kasa device, in this case SmartPlug superclass
         index (int): index of the child plug in the strip
+        now (Optional[datetime]): charge start time, defaults to datetime.now()
 
     Returns:
         BatteryStripPlug: The BatteryStripPlug instance will have the appropriate BatteryChargeMode set
     '''
-    plug_full_charge_list = BatteryManagerState().plug_full_charge_list
-    plug_storage_list = BatteryManagerState().plug_storage_list
+    state = BatteryManagerState()
+    plug_full_charge_list = state.plug_full_charge_list
+    plug_storage_list = state.plug_storage_list
     plug: BatteryStripPlug = BatteryStripPlug(
-        plug_name, smart_device, index, BatteryManagerState().max_cycles_in_fine_mode, get_device_config(plug_name))
+        plug_name, smart_device, index, state.max_cycles_in_fine_mode, get_device_config(plug_name), now)
     if plug_name in plug_storage_list:
         plug.set_battery_charge_mode(BatteryChargeMode.STORAGE)
     elif plug_name in plug_full_charge_list:
         plug.set_battery_charge_mode(BatteryChargeMode.FULL)
     else:
         plug.set_battery_charge_mode(
-            BatteryChargeMode.FULL if BatteryManagerState().force_full_charge else BatteryChargeMode.NOMINAL)
+            BatteryChargeMode.FULL if state.force_full_charge else BatteryChargeMode.NOMINAL)
     return plug
 
 
-async def update_strip_plug(plug, smart_device, index) -> BatteryStripPlug:
-    strip_plug = create_battery_strip_plug(plug.alias, smart_device, index)
-    logger.info(
-        f'SmartStrip: plug: {plug.alias}, battery_charge_mode: {str(strip_plug.battery_charge_mode)}')
-    await strip_plug.update()
-    logger.info(f'SmartStrip: plug: {plug.alias}, update() ok')
-    return strip_plug
-
-
-async def update_battery_plug_list(smart_device: SmartDevice, manufacturer_plug_names: dict) -> None:
+def update_battery_plug_list(
+        smart_device: SmartDevice, manufacturer_plug_names: Collection[str], now: Optional[datetime] = None) -> None:
     '''
     Finds plug depending on if the plug is singular or part of a battery strip.
     Create the appropriate BatteryPlug or BatteryStripPlug and append to the global battery_plug_list
@@ -925,34 +972,149 @@ async def update_battery_plug_list(smart_device: SmartDevice, manufacturer_plug_
 
     Args:
         smart_device (SmartDevice): Can be either a plug or a strip of plugs
-        manufacturer_plug_names (dict): _description_
+        manufacturer_plug_names (Collection[str]): plug names listed in the config file Plugs section
+        now (Optional[datetime]): charge start time shared by every plug created, defaults to datetime.now()
     '''
-    battery_plug_list = BatteryManagerState().battery_plug_list
+    state = BatteryManagerState()
+    battery_plug_list = state.battery_plug_list
+    if now is None:
+        now = datetime.now()
     if smart_device.is_plug:
-        logger.info(f'init: found a SmartPlug: {smart_device.alias}')
+        logger.info('init: found a SmartPlug: %s', smart_device.alias)
         if (
-            BatteryManagerState().scan_for_battery_prefix and BATTERY_PREFIX in smart_device.alias
+            state.scan_for_battery_prefix and BATTERY_PREFIX in smart_device.alias
         ) or (
             smart_device.alias in manufacturer_plug_names
         ):
-            plug = create_battery_plug(smart_device.alias, smart_device)
+            plug = create_battery_plug(smart_device.alias, smart_device, now)
             logger.info(
-                f'SmartPlug: {smart_device.alias}, battery_charge_mode: {str(plug.battery_charge_mode)}')
+                'SmartPlug: %s, battery_charge_mode: %s', smart_device.alias, plug.battery_charge_mode.name)
             battery_plug_list.append(plug)
             return
     if smart_device.is_strip:
         logger.info(
-            f'init: found a SmartStrip: {smart_device.alias}, children: {str(len(smart_device.children))}')
-        tasks = []
+            'init: found a SmartStrip: %s, children: %s', smart_device.alias, len(smart_device.children))
+        # init() has just refreshed the strip, which covers every child, so no per child update is needed
         for index, plug in enumerate(smart_device.children):
             if (
-                BatteryManagerState().scan_for_battery_prefix and BATTERY_PREFIX in plug.alias
+                state.scan_for_battery_prefix and BATTERY_PREFIX in plug.alias
             ) or (
                 plug.alias in manufacturer_plug_names
             ):
-                tasks.append(update_strip_plug(plug, smart_device, index))
-        updated_plugs = await asyncio.gather(*tasks)
-        battery_plug_list.extend(updated_plugs)
+                strip_plug = create_battery_strip_plug(plug.alias, smart_device, index, now)
+                logger.info(
+                    'SmartStrip: plug: %s, battery_charge_mode: %s', plug.alias, strip_plug.battery_charge_mode.name)
+                battery_plug_list.append(strip_plug)
+
+
+# Devices found by the last Discover.discover() of this run, see discover_devices()
+_discovered_devices: Dict[str, SmartDevice] = {}
+
+
+def load_device_hosts(cache_file: str) -> List[str]:
+    '''
+    Returns the hosts saved by save_device_hosts(), empty if there is no usable cache
+    '''
+    try:
+        with open(cache_file, 'r') as f:
+            hosts = json.load(f)
+        if isinstance(hosts, list) and all(isinstance(host, str) for host in hosts):
+            return hosts
+    except (OSError, ValueError):
+        pass
+    return []
+
+
+def save_device_hosts(cache_file: str, hosts: List[str]) -> None:
+    '''
+    Remembers the hosts of the devices holding the battery plugs so the next run can skip the broadcast, best effort only
+    '''
+    try:
+        with open(cache_file, 'w') as f:
+            json.dump(sorted(hosts), f)
+    except OSError as e:
+        logger.warning('unable to write device host cache %s: %s', cache_file, e)
+
+
+def device_aliases(smart_device: SmartDevice) -> Set[str]:
+    '''
+    Returns the alias of a device plus the aliases of its children for power strips
+    '''
+    aliases = {smart_device.alias}
+    if smart_device.is_strip:
+        aliases.update(child.alias for child in smart_device.children)
+    return aliases
+
+
+async def discover_cached_devices(hosts: List[str], plug_names: Collection[str]) -> Optional[Dict[str, SmartDevice]]:
+    '''
+    Probes the hosts from a previous run directly instead of broadcasting.
+
+    Args:
+        hosts (List[str]): hosts from load_device_hosts()
+        plug_names (Collection[str]): plug names from the config file, all must be found
+
+    Returns:
+        Optional[Dict[str, SmartDevice]]: devices keyed by host, None if any host or plug name is missing
+    '''
+    devices = await asyncio.gather(
+        *(Discover.discover_single(host, discovery_timeout=DEVICE_PROBE_TIMEOUT_SECS) for host in hosts), return_exceptions=True)
+    if any(device is None or isinstance(device, Exception) for device in devices):
+        return None
+    results = await asyncio.gather(*(update_device(device) for device in devices), return_exceptions=True)
+    if any(isinstance(result, Exception) for result in results):
+        return None
+    aliases: Set[str] = set()
+    for device in devices:
+        aliases |= device_aliases(device)
+    if not aliases.issuperset(plug_names):
+        return None
+    return {device.host: device for device in devices}
+
+
+async def discover_all() -> Dict[str, SmartDevice]:
+    '''
+    Broadcast discovery is unreliable, a device can miss any one broadcast.  A single Discover.discover()
+    sends DISCOVERY_PACKETS broadcasts on one socket and collects every device that answers any of them
+    within DISCOVERY_TIMEOUT_SECS.
+
+    Returns:
+        Dict[str, SmartDevice]: discovered devices keyed by host
+    '''
+    return await Discover.discover(discovery_timeout=DISCOVERY_TIMEOUT_SECS, discovery_packets=DISCOVERY_PACKETS)
+
+
+async def discover_devices() -> Dict[str, SmartDevice]:
+    '''
+    Returns the devices found by the previous discovery in this run if they all still respond,
+    otherwise runs a new Discover.discover() broadcast.  Saves the broadcast on analyze_loop retries.
+    On the first attempt of a run, the hosts cached by a previous run are probed directly when every
+    plug is named in the config file, falling back to the broadcast if anything is missing.
+
+    Returns:
+        Dict[str, SmartDevice]: discovered devices keyed by host
+    '''
+    if len(_discovered_devices) > 0:
+        results = await asyncio.gather(
+            *(update_device(smart_device) for smart_device in _discovered_devices.values()), return_exceptions=True)
+        if not any(isinstance(result, Exception) for result in results):
+            logger.info('init: reusing %s previously discovered devices', len(_discovered_devices))
+            return dict(_discovered_devices)
+    else:
+        cache_file = BatteryManagerState().device_host_cache_file
+        plug_names = BatteryManagerState().plug_manufacturer_map.keys()
+        # a prefix scan can pick up plugs that are not in the config file, only a broadcast finds those
+        if cache_file is not None and len(plug_names) > 0 and not BatteryManagerState().scan_for_battery_prefix:
+            hosts = load_device_hosts(cache_file)
+            found = await discover_cached_devices(hosts, plug_names) if len(hosts) > 0 else None
+            if found is not None:
+                logger.info('init: reusing %s cached device hosts', len(found))
+                _discovered_devices.update(found)
+                return found
+    found = await discover_all()
+    _discovered_devices.clear()
+    _discovered_devices.update(found)
+    return found
 
 
 async def init() -> int:
@@ -964,223 +1126,368 @@ async def init() -> int:
         int: number of ebike battery plugs discovered
     '''
     battery_plug_list = BatteryManagerState().battery_plug_list
-    found = await Discover.discover()
-    force_log(f'>>>>> init <<<<<')
+    found = await discover_devices()
+    force_log('>>>>> init <<<<<')
     # Handle all plug names in config file CONFIG_PLUGS_SECTION.  These do not have to have a BATTERY_PREFIX
-    manufacturer_plug_names = BatteryManagerState().plug_manufacturer_map.keys()
-    for smart_device in found.values():
-        await smart_device.update()
-        await update_battery_plug_list(smart_device, manufacturer_plug_names)
+    manufacturer_plug_names = frozenset(BatteryManagerState().plug_manufacturer_map)
+    # Each update() is a network round trip, overlap them instead of paying for them one at a time
+    # Devices reused by discover_devices() were just refreshed, update_device() coalesces those
+    smart_devices = list(found.values())
+    results = await asyncio.gather(*(update_device(smart_device) for smart_device in smart_devices), return_exceptions=True)
+    battery_hosts: List[str] = []
+    # One charge start time for every plug found in this pass
+    now = datetime.now()
+    for smart_device, result in zip(smart_devices, results):
+        if isinstance(result, Exception):
+            logger.warning(
+                '>>>>> init <<<<< -- unable to update device: %s, exception: %s', smart_device.host, result)
+            continue
+        plug_ct = len(battery_plug_list)
+        update_battery_plug_list(smart_device, manufacturer_plug_names, now)
+        if len(battery_plug_list) > plug_ct:
+            battery_hosts.append(smart_device.host)
     battery_count = len(battery_plug_list)
+    cache_file = BatteryManagerState().device_host_cache_file
+    if cache_file is not None and battery_count > 0:
+        save_device_hosts(cache_file, battery_hosts)
     if battery_count == 0:
+        # nothing usable was found, make the next attempt rediscover
+        _discovered_devices.clear()
         logger.warning(
-            f'>>>>> init <<<<< -- EMPTY battery_plug_list + DEBUG -- devices found: {str(found)}')
+            '>>>>> init <<<<< -- EMPTY battery_plug_list + DEBUG -- devices found: %s', found)
         logger.warning(
-            f'>>>>> init <<<<< -- If this error persists, please restart the TP-Link power strip or plugs to reset them')
+            '>>>>> init <<<<< -- If this error persists, please restart the TP-Link power strip or plugs to reset them')
     return battery_count
 
 
+def setup_retry_delay_secs(attempt: int) -> float:
+    '''
+    Exponential backoff with jitter between setup_plug() retries, so plugs retried together
+    do not all hit the devices at the same moment
+
+    Args:
+        attempt (int): number of failed attempts so far, starting at 1
+
+    Returns:
+        float: seconds to wait, at most PLUG_RETRY_SETUP_DELAY_MAX_SECS
+    '''
+    return min(2 ** attempt + random.uniform(0, 1), PLUG_RETRY_SETUP_DELAY_MAX_SECS)
+
+
+async def wait_for_power(plug: BatteryPlug) -> float:
+    '''
+    Polls a plug that was just turned on until its charger draws power, starting at
+    PLUG_POWER_POLL_INITIAL_SECS and doubling up to PLUG_POWER_POLL_MAX_SECS between polls.
+    Gives up after PLUG_POWER_POLL_TIMEOUT_SECS.
+
+    Args:
+        plug (BatteryPlug): plug to poll
+
+    Returns:
+        float: the last power reading, 0 or less if the charger never started drawing power
+    '''
+    delay = PLUG_POWER_POLL_INITIAL_SECS
+    waited = 0.0
+    device_power_consumption = 0.0
+    while waited < PLUG_POWER_POLL_TIMEOUT_SECS:
+        await asyncio.sleep(delay)
+        waited += delay
+        # each poll must reach the device, a coalesced update would return the previous reading
+        await plug.update(force=True)
+        device_power_consumption = plug.get_power()
+        if device_power_consumption > 0:
+            break
+        delay = min(delay * 2, PLUG_POWER_POLL_MAX_SECS, PLUG_POWER_POLL_TIMEOUT_SECS - waited)
+    return device_power_consumption
+
+
+async def setup_plug(plug: BatteryPlug) -> int:
+    '''
+    async function.  Per plug portion of setup(), resets the emeter state and makes sure
+    the plug is on and the charger is drawing power
+
+    Args:
+        plug (BatteryPlug): plug to set up
+
+    Returns:
+        int: number of retries used, PLUG_RETRY_SETUP_LIMIT if the plug never used any power
+    '''
+    await plug.update()
+    await asyncio.sleep(PLUG_SETTLE_TIME_SECS)
+    await plug.reset_emeter_state()
+    logger.info('>>>>> setup after reset_emeter_state()')
+    plug_retry_setup_ct: int = 0
+    while plug_retry_setup_ct < PLUG_RETRY_SETUP_LIMIT:
+        logger.info('>>>>> setup plug: %s', plug.name)
+        if not plug.is_on():
+            await plug.turn_on()
+            device_power_consumption = await wait_for_power(plug)
+        else:
+            await plug.update()
+            device_power_consumption = plug.get_power()
+        if device_power_consumption > 0:
+            logger.info('>>>>> setup plug: %s is using power: %s', plug.name, device_power_consumption)
+            break
+        # might not have started correctly, retry
+        # It might be ok if no charger
+        logger.info('>>>>> setup plug: %s is NOT using power: %s', plug.name, device_power_consumption)
+        plug_retry_setup_ct += 1
+        # turn_off() has already refreshed the device state
+        await plug.turn_off()
+        if plug_retry_setup_ct < PLUG_RETRY_SETUP_LIMIT:
+            await asyncio.sleep(setup_retry_delay_secs(plug_retry_setup_ct))
+    return plug_retry_setup_ct
+
+
 async def setup() -> None:
     '''
     async function.  Updates devices with kasa library to get valid data into each SmartDevice instance
     Scan plugs and make sure all are on at exit
+    Plugs are set up concurrently since the work is almost entirely waiting on sleeps and the devices.
+    As with a TaskGroup, the first plug to fail cancels the others, so no setup is left running
+    (and turning plugs on) after setup() raises.
 
+    Raises:
+        BatteryPlugException: the first plug that failed to set up
     '''
     battery_plug_list = BatteryManagerState().battery_plug_list
     force_log('>>>>> setup ENTRY')
-    for plug in battery_plug_list:
-        await plug.update()
-        await asyncio.sleep(PLUG_SETTLE_TIME_SECS)
-        await plug.reset_emeter_state()
-        logger.info('>>>>> setup after reset_emeter_state()')
-        plug_retry_setup_ct: int = 0
-        while plug_retry_setup_ct < PLUG_RETRY_SETUP_LIMIT:
-            logger.info(f'>>>>> setup plug: {plug.name}')
-            if not plug.is_on():
-                await plug.turn_on()
-                await asyncio.sleep(5)
-                await plug.update()
-                device_power_consumption = plug.get_power()
-                if device_power_consumption > 0:
-                    logger.info(
-                        f'>>>>> setup plug: {plug.name} is using power: {device_power_consumption}')
-                    break
-                else:
-                    # might not have started correctly, retry
-                    # It might be ok if no charger
-                    plug_retry_setup_ct += 1
-                    await plug.turn_off()
-                    await asyncio.sleep(2)
-                    await plug.update()
-            else:
-                await plug.update()
-                device_power_consumption = plug.get_power()
-                if device_power_consumption > 0:
-                    logger.info(
-                        f'>>>>> setup plug: {plug.name} is using power: {device_power_consumption}')
-                    break
-                else:
-                    logger.info(
-                        f'>>>>> setup plug: {plug.name} is NOT using power: {device_power_consumption}')
-                    plug_retry_setup_ct += 1
-                    await plug.turn_off()
-                    await asyncio.sleep(2)
-                    await plug.update()
-
+    tasks = [asyncio.ensure_future(setup_plug(plug)) for plug in battery_plug_list]
+    try:
+        if len(tasks) > 0:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        # also reached when setup() itself is cancelled
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if len(pending) > 0:
+            await asyncio.gather(*pending, return_exceptions=True)
+    for task in tasks:
+        if not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+    retries = [task.result() for task in tasks]
+    for plug, plug_retry_setup_ct in zip(battery_plug_list, retries):
         if plug_retry_setup_ct == PLUG_RETRY_SETUP_LIMIT:
-            logger.warning(
-                f'!!!!! WARNING !!!!!, no power usage on plug: {plug.name}')
+            logger.warning('!!!!! WARNING !!!!!, no power usage on plug: %s', plug.name)
         else:
-            logger.info(
-                f'>>>>> setup -- plug: {plug.name} appears active, retries: {plug_retry_setup_ct}')
+            logger.info('>>>>> setup -- plug: %s appears active, retries: %s', plug.name, plug_retry_setup_ct)
 
     logger.info('>>>>> setup EXIT')
 
 
-def delete_plugs(battery_plug_list: list, plugs_to_delete: list) -> None:
+def delete_plugs(battery_plug_list: list, plugs_to_delete: list, stop_time: Optional[datetime] = None) -> None:
     '''
     Helper function to delete a list of plugs from global battery_plug_list
+    Plugs are matched by identity and battery_plug_list is rebuilt in place in a single pass
 
     Args:
         plugs_to_delete (list): plugs that need to be removed from global battery_plug_list
+        stop_time (datetime, optional): stop time recorded for the deleted plugs. Defaults to now.
     '''
     # logger.info(f"delete_plugs number to delete: {len(battery_plug_list)}")
-    for plug in plugs_to_delete:
+    pending: Dict[int, BatteryPlug] = {id(plug): plug for plug in plugs_to_delete}
+    remaining_plugs = []
+    for plug in battery_plug_list:
+        if pending.pop(id(plug), None) is None:
+            remaining_plugs.append(plug)
+            continue
         try:
-            battery_plug_list.remove(plug)
-            stop_active_plug(plug.name)
-        except ValueError as e:
-            logger.warning(
-                f'WARNING: plug: {plug.name} is not in battery_plug_list, exception: {str(e)}')
+            stop_active_plug(plug.name, stop_time)
         except Exception as e:
-            logger.warning(
-                f'ERROR: plug: {plug.name} had an unexpected exception: {str(e)}')
+            logger.warning('ERROR: plug: %s had an unexpected exception: %s', plug.name, e)
+    battery_plug_list[:] = remaining_plugs
+    for plug in pending.values():
+        logger.warning('WARNING: plug: %s is not in battery_plug_list', plug.name)
 
 
-def set_active_plug(battery_plug: BatteryPlug) -> None:
-    active_plugs: Set[ActivePlug] = BatteryManagerState().active_plugs
-    if not any(battery_plug.name == plug.plug.name for plug in active_plugs):
-        active_plugs.add(ActivePlug(
-            plug=battery_plug, start_time=datetime.now()))
+def set_active_plug(battery_plug: BatteryPlug, start_time: Optional[datetime] = None) -> None:
+    active_plugs: Dict[str, ActivePlug] = BatteryManagerState().active_plugs
+    if battery_plug.name not in active_plugs:
+        active_plugs[battery_plug.name] = ActivePlug(
+            plug=battery_plug, start_time=start_time or datetime.now())
 
 
-def stop_active_plug(plug_name: str) -> None:
-    active_plugs: Set[ActivePlug] = BatteryManagerState().active_plugs
-    active_plug: ActivePlug = next(
-        (x for x in active_plugs if x.plug.name == plug_name), None)
+def stop_active_plug(plug_name: str, stop_time: Optional[datetime] = None) -> None:
+    active_plugs: Dict[str, ActivePlug] = BatteryManagerState().active_plugs
+    active_plug: ActivePlug = active_plugs.get(plug_name)
     if active_plug:
-        active_plug.stop_time = datetime.now()
+        active_plug.stop_time = stop_time or datetime.now()
 
 
-async def analyze() -> bool:
+async def analyze(probe_all: bool = False) -> bool:
     '''
     async function
     Performs a single pass analysis of power levels
     Called periodically from analyze_loop
+    Only the plugs whose own probe interval has run out are refreshed, the others keep charging
+    and just bound how long analyze_loop sleeps before the next pass.
+
+    Args:
+        probe_all (bool): refresh every plug regardless of its schedule, e.g. after request_probe()
 
     Returns:
         bool: True if we are actively charging at the exit of this function
     '''
     global start_threshold_logger
-    active_plugs: Set[ActivePlug] = BatteryManagerState().active_plugs
-    battery_plug_list = BatteryManagerState().battery_plug_list
-
-    probe_interval_secs = BatteryManagerState().probe_interval_secs
-
-    logger.info(
-        f'>>>>> analyze --> probe_interval_secs: {str(probe_interval_secs)}, analyze_first_entry: {str(BatteryManagerState().analyze_first_entry)} <<<<<')
+    state = BatteryManagerState()
+    active_plugs: Dict[str, ActivePlug] = state.active_plugs
+    battery_plug_list = state.battery_plug_list
+
+    probe_interval_secs = state.probe_interval_secs
+    analyze_first_entry = state.analyze_first_entry
+    # one timestamp for the whole pass, used for expiry checks and active plug bookkeeping
+    now = datetime.now()
+    now_monotonic = monotonic()
+
+    logger.info('>>>>> analyze --> probe_interval_secs: %s, analyze_first_entry: %s <<<<<',
+                probe_interval_secs, analyze_first_entry)
     actively_charging = False
 
-    def set_actively_charging(plug: BatteryPlug) -> None:
+    # Each actively charging plug proposes its own probe interval, the next probe happens at the
+    # shortest one.  Starting from MAX_PROBE_INTERVAL_SECS handles the case where a plug in fine mode
+    # finished and the remaining plugs can go back to a longer interval.
+    # At the end of the loop, check next_probe_interval_secs against probe_interval_secs
+    fine_probe_interval_secs: int = state.fine_probe_interval_secs
+    next_probe_interval_secs = MAX_PROBE_INTERVAL_SECS
+
+    def set_actively_charging(plug: BatteryPlug, device_power_consumption: float) -> None:
         # logger.error(
         #     f'!!!! DEBUG: set_actively_charging(): plug: {str(plug.name)}')
-        nonlocal actively_charging
+        nonlocal actively_charging, next_probe_interval_secs
         actively_charging = True
-        logger.info(f'{plug.name} is actively_charging')
-        set_active_plug(plug)
-
-    # track next_probe_interval_secs starting at COARSE_PROBE_INTERVAL_SECS to handle the case
-    # where we dropped into a fine_probe_interval_secs for one battery and that battery finished
-    # but the remaining battery is still in the range for COARSE_PROBE_INTERVAL_SECS
-    # At the end of the loop, check next_probe_interval_secs against probe_interval_secs
-    fine_probe_interval_secs: int = BatteryManagerState().fine_probe_interval_secs
-    next_probe_interval_secs = COARSE_PROBE_INTERVAL_SECS
+        logger.info('%s is actively_charging', plug.name)
+        set_active_plug(plug, now)
+        plug_probe_interval_secs = plug.update_probe_interval(device_power_consumption, fine_probe_interval_secs)
+        plug.next_probe_at = now_monotonic + plug_probe_interval_secs
+        next_probe_interval_secs = min(next_probe_interval_secs, plug_probe_interval_secs)
     plugs_to_delete = []
+    # switched off together after the loop, see turn_off_plugs()
+    plugs_to_turn_off = []
+
+    def is_due(plug: BatteryPlug) -> bool:
+        return probe_all or plug.next_probe_at is None or plug.next_probe_at - now_monotonic <= PROBE_SCHEDULE_SLACK_SECS
 
-    async def turn_off_and_delete_plug(plug) -> None:
+    def turn_off_and_delete_plug(plug) -> None:
         plug.get_power_total()
-        await plug.turn_off()
-        plugs_to_delete.append(plug)
+        plugs_to_turn_off.append(plug)
+
 
+    # Refresh the due plugs concurrently, the decision logic below is then purely synchronous
+    await asyncio.gather(*(plug.update() for plug in battery_plug_list if is_due(plug)))
 
     for plug in battery_plug_list:
         plug_name = plug.name
-        await plug.update()
+
+        if not is_due(plug):
+            if plug.is_time_expired(now):
+                logger.info('%s time expired', plug_name)
+                plugs_to_delete.append(plug)
+                continue
+            # still charging from its last probe, wake up in time for its next one
+            actively_charging = True
+            next_probe_interval_secs = min(next_probe_interval_secs, ceil(plug.next_probe_at - now_monotonic))
+            continue
 
         if not plug.is_on():
-            logger.info(plug_name + ' is OFF')
+            logger.info('%s is OFF', plug_name)
             plugs_to_delete.append(plug)
             continue
 
         # check if plug's time is expired
-        if plug.is_time_expired(datetime.now()):
-            logger.info(plug_name + ' time expired')
+        if plug.is_time_expired(now):
+            logger.info('%s time expired', plug_name)
             plugs_to_delete.append(plug)
             continue
 
         device_power_consumption = plug.get_power()
-        logger.info(plug_name + ': ' + str(device_power_consumption))
-        if BatteryManagerState().analyze_first_entry:
-            start_threshold_logger.info(
-                plug_name + ': ' + str(device_power_consumption))
+        logger.info('%s: %s', plug_name, device_power_consumption)
+        if analyze_first_entry:
+            start_threshold_logger.info('%s: %s', plug_name, device_power_consumption)
             if not plug.start_threshold_check(device_power_consumption):
                 start_threshold_logger.info(
-                    f'!!!! DEBUG: analyze(): LOOP - start_threshold_check() is False, plug: {str(plug_name)}, power: {str(device_power_consumption)}')
-                await turn_off_and_delete_plug(plug)
+                    '!!!! DEBUG: analyze(): LOOP - start_threshold_check() is False, plug: %s, power: %s', plug_name, device_power_consumption)
+                turn_off_and_delete_plug(plug)
                 continue
             else:
                 start_threshold_logger.info(
-                    f'!!!! DEBUG: analyze(): LOOP - start_threshold_check() is True, plug: {str(plug_name)}, power: {str(device_power_consumption)}')
+                    '!!!! DEBUG: analyze(): LOOP - start_threshold_check() is True, plug: %s, power: %s', plug_name, device_power_consumption)
 
         if plug.stop_threshold_check(device_power_consumption):
             turn_off_plug = plug.check_full_charge() or plug.check_storage_mode()
             if turn_off_plug:
                 logger.info(
-                    f'{plug_name}: (stop_threshold_check) has no battery present or it may be fully charged: {str(device_power_consumption)}')
-                await turn_off_and_delete_plug(plug)
+                    '%s: (stop_threshold_check) has no battery present or it may be fully charged: %s', plug_name, device_power_consumption)
+                turn_off_and_delete_plug(plug)
                 continue
             plug.fine_mode_active = True
-            next_probe_interval_secs = fine_probe_interval_secs
-            set_actively_charging(plug)
+            set_actively_charging(plug, device_power_consumption)
             continue
 
         # By here check if we should switch to fine_probe_interval to detect charged state sooner
-        if not plug.fine_mode_active and next_probe_interval_secs > BatteryManagerState().fine_probe_interval_secs and device_power_consumption < plug.get_coarse_probe_threshold():
+        if not plug.fine_mode_active and device_power_consumption < plug.get_coarse_probe_threshold():
             plug.fine_mode_active = True
-            logger.info(
-                f'{plug_name}: fine probe interval ({str(fine_probe_interval_secs)}) secs is now ON')
+            logger.info('%s: fine probe interval (%s) secs is now ON', plug_name, fine_probe_interval_secs)
 
         if plug.fine_mode_active:
-            next_probe_interval_secs = fine_probe_interval_secs
             # Must handle additional case of trying for full charge cycle, we may NEVER reach the active_charge_power_threshold
             if plug.check_full_charge():
-                logger.info(
-                    f'{plug_name}: is done with a full charge cycle at: {str(device_power_consumption)}')
-                await turn_off_and_delete_plug(plug)
+                logger.info('%s: is done with a full charge cycle at: %s', plug_name, device_power_consumption)
+                turn_off_and_delete_plug(plug)
                 continue
 
-        set_actively_charging(plug)
+        set_actively_charging(plug, device_power_consumption)
 
-    BatteryManagerState().analyze_first_entry = False
-    delete_plugs(battery_plug_list, plugs_to_delete)
+    state.analyze_first_entry = False
+    failures = []
+    if len(plugs_to_turn_off) > 0:
+        for plug, result in zip(plugs_to_turn_off, await turn_off_plugs(plugs_to_turn_off)):
+            if result is None:
+                plugs_to_delete.append(plug)
+            else:
+                failures.append(result)
+    delete_plugs(battery_plug_list, plugs_to_delete, now)
+    if len(failures) > 0:
+        raise failures[0]
 
     if actively_charging and (probe_interval_secs != next_probe_interval_secs):
-        logger.info(
-            f'Switch to probe_interval_secs: {str(next_probe_interval_secs)} from: {str(probe_interval_secs)}')
-        BatteryManagerState().probe_interval_secs = next_probe_interval_secs
+        logger.info('Switch to probe_interval_secs: %s from: %s', next_probe_interval_secs, probe_interval_secs)
+        state.probe_interval_secs = next_probe_interval_secs
     return actively_charging
 
 
+# Set to cut the current probe interval short, see request_probe()
+wake_event: Optional[asyncio.Event] = None
+
+
+def request_probe() -> None:
+    '''
+    Wakes analyze_loop so the next analyze() pass runs immediately instead of at the end of
+    the current probe interval.  Installed as the SIGUSR1 handler while analyze_loop runs.
+    '''
+    if wake_event is not None:
+        wake_event.set()
+
+
+async def wait_for_next_probe(timeout_secs: float) -> bool:
+    '''
+    Sleeps until the next probe is due or request_probe() is called, whichever comes first
+
+    Args:
+        timeout_secs (float): current probe interval
+
+    Returns:
+        bool: True if woken early by request_probe()
+    '''
+    try:
+        await asyncio.wait_for(wake_event.wait(), timeout=timeout_secs)
+    except asyncio.TimeoutError:
+        return False
+    wake_event.clear()
+    logger.info('analyze_loop: probe requested, waking early')
+    return True
+
+
 async def analyze_loop(final_stop_time: datetime) -> Union[bool, AnalyzeException]:
     '''
     async function.  Encapsulates all downstream async functions.
@@ -1198,20 +1505,33 @@ async def analyze_loop(final_stop_time: datetime) -> Union[bool, AnalyzeExceptio
     Returns:
         bool: Normal exit indicating success or not
     '''
-    probe_interval_secs: int = BatteryManagerState().probe_interval_secs
-    battery_plug_list = BatteryManagerState().battery_plug_list
+    state = BatteryManagerState()
+    battery_plug_list = state.battery_plug_list
+    # watchdog on the monotonic clock so wall clock adjustments cannot shorten or extend the run
+    deadline = monotonic() + max(0.0, (final_stop_time - datetime.now()).total_seconds())
+
+    global wake_event
+    # The event must belong to the running loop so it is created here rather than at import
+    wake_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    sigusr1 = getattr(signal, 'SIGUSR1', None)
+    try:
+        if sigusr1 is not None:
+            loop.add_signal_handler(sigusr1, request_probe)
+    except (NotImplementedError, RuntimeError, ValueError):
+        sigusr1 = None
 
     retry_limit = RETRY_LIMIT
     init_complete = False
     success = False
-    logger.info(f'analyze_loop: START')
+    logger.info('analyze_loop: START')
     while not success and retry_limit > 0:
         exception_occurred = False
-        logger.info(f'analyze_loop: LOOP TOP: success: {success}, retry_limit: {retry_limit}')
+        logger.info('analyze_loop: LOOP TOP: success: %s, retry_limit: %s', success, retry_limit)
         # check absolute stop limit
-        if datetime.now() > final_stop_time:
+        if monotonic() > deadline:
             logger.error(
-                f"max runtime {BatteryManagerState().max_hours_to_run} hours exceeded, exit analyze_loop")
+                "max runtime %s hours exceeded, exit analyze_loop", state.max_hours_to_run)
             break
         try:
             if not init_complete:
@@ -1221,22 +1541,28 @@ async def analyze_loop(final_stop_time: datetime) -> Union[bool, AnalyzeExceptio
                     raise AnalyzeException('ERROR, unexpectedly empty battery_plug_list')
                 else:
                     init_complete = True
-                    logger.info(
-                        f'SUCCESSFULLY found: {str(battery_plug_ct)} smart battery plugs')
+                    logger.info('SUCCESSFULLY found: %s smart battery plugs', battery_plug_ct)
 
             await asyncio.sleep(SETTLE_TIME_SECS)
             await setup()
             await asyncio.sleep(SETTLE_TIME_SECS)
             charging = True
+            probe_all = True
             while charging:
-                charging = await analyze()
+                pass_start = monotonic()
+                charging = await analyze(probe_all)
+                flush_log_handlers()
                 if charging:
-                    await asyncio.sleep(probe_interval_secs)
+                    # analyze() adapts the interval on every pass, an explicit request probes every plug
+                    # The interval is measured from the start of the pass so the time analyze() took
+                    # does not accumulate as drift, the plugs' next_probe_at use the same reference
+                    probe_all = await wait_for_next_probe(
+                        max(0.0, pass_start + state.probe_interval_secs - monotonic()))
             success = True
         except AnalyzeException as e:
             exception_occurred = True
             logger.error(
-                f'!!!!!>>>>> ERROR in Execution e: {str(e)}<<<<<!!!!!')
+                '!!!!!>>>>> ERROR in Execution e: %s<<<<<!!!!!', e)
             if len(battery_plug_list) > 0:
                 logger.error(
                     '!!!!!>>>>> ERROR Attempting shutdown_plugs <<<<<!!!!!')
@@ -1244,20 +1570,24 @@ async def analyze_loop(final_stop_time: datetime) -> Union[bool, AnalyzeExceptio
         except BatteryPlugException as e:
             exception_occurred = True
             logger.error(
-                f'!!!!!>>>>> ERROR ERROR ERROR ERROR BatteryPlugException: {e} <<<<<!!!!!')
+                '!!!!!>>>>> ERROR ERROR ERROR ERROR BatteryPlugException: %s <<<<<!!!!!', e)
         except Exception as e:
             exception_occurred = True
             logger.error(
-                f'!!!!!>>>>> ERROR ERROR ERROR ERROR Unexpected Exception: {e} <<<<<!!!!!')
+                '!!!!!>>>>> ERROR ERROR ERROR ERROR Unexpected Exception: %s <<<<<!!!!!', e)
         finally:
             if exception_occurred:
                 retry_limit = retry_limit - 1
                 traceback_str = traceback.format_exc()
                 logger.error(
-                    f'!!!!!>>>>> ERROR finally: retry_limit: {retry_limit}, traceback: {traceback_str} <<<<<!!!!!')
+                    '!!!!!>>>>> ERROR finally: retry_limit: %s, traceback: %s <<<<<!!!!!', retry_limit, traceback_str)
                 if retry_limit > 0:
-                    await asyncio.sleep(RETRY_DELAY_SECS)
+                    # back off on repeated failures, but never sleep past the watchdog deadline
+                    retry_delay_secs = min(RETRY_DELAY_SECS * 2 ** (RETRY_LIMIT - retry_limit - 1), RETRY_DELAY_MAX_SECS)
+                    await asyncio.sleep(min(retry_delay_secs, max(0.0, deadline - monotonic())))
 
+    if sigusr1 is not None:
+        loop.remove_signal_handler(sigusr1)
     return success
 
 
@@ -1267,30 +1597,37 @@ async def shutdown_plugs() -> None:
     Not part of the normal shutdown
     '''
     battery_plug_list = BatteryManagerState().battery_plug_list
-    logger.info(f'>>>>> {fn_name()} ENTRY: battery_plug_list: {len(battery_plug_list)} <<<<<')
+    logger.info('>>>>> shutdown_plugs ENTRY: battery_plug_list: %s <<<<<', len(battery_plug_list))
     try:
         plugs_to_delete = []
-        for plug in battery_plug_list:
-            await plug.update()
-            await plug.turn_off()
-            plugs_to_delete.append(plug)
+        # A stale plug state should not prevent us from attempting to turn it off
+        await asyncio.gather(*(plug.update() for plug in battery_plug_list), return_exceptions=True)
+        results = await turn_off_plugs(battery_plug_list)
+        failures = []
+        for plug, result in zip(battery_plug_list, results):
+            if result is not None:
+                failures.append(result)
+            else:
+                plugs_to_delete.append(plug)
+        if len(failures) > 0:
+            raise failures[0]
     except BatteryPlugException as e:
-        logger.error(f'FATAL ERROR: {fn_name()}: {str(e)}')
+        logger.error('FATAL ERROR: shutdown_plugs: %s', e)
         logger.error(
             'FATAL ERROR: Unable to shutdown plugs, check plug status manually')
         return
     except Exception as e:
-        logger.error(f'FATAL ERROR: {fn_name()}:Unexpected Exception in shutdown_plugs: {str(e)}')
+        logger.error('FATAL ERROR: shutdown_plugs:Unexpected Exception in shutdown_plugs: %s', e)
         logger.error(
-            f'FATAL ERROR: {fn_name()}:Unable to shutdown plugs, check plug status manually')
+            'FATAL ERROR: shutdown_plugs:Unable to shutdown plugs, check plug status manually')
         return
     finally:      
         delete_plugs(battery_plug_list, plugs_to_delete)
         # We expect battery_plug_list to be empty at this point
         if len(battery_plug_list) > 0:
-            logger.error(f'UNEXPECTED, {fn_name()}:battery_plug_list not empty: {len(battery_plug_list)}')
+            logger.error('UNEXPECTED, shutdown_plugs:battery_plug_list not empty: %s', len(battery_plug_list))
             battery_plug_list.clear()
-        logger.info(f'>>>>> {fn_name()}: EXIT <<<<<')
+        logger.info('>>>>> shutdown_plugs: EXIT <<<<<')
 
 
 def get_device_config(plug_name: str) -> DeviceConfig:
@@ -1301,14 +1638,123 @@ def get_device_config(plug_name: str) -> DeviceConfig:
     3. if the plug_name manufacturer is missing => DEFAULT
     Note, device_config must always have a DEFAULT_CONFIG_TAG tag
     '''
-    plug_manufacturer_map = BatteryManagerState().plug_manufacturer_map
-    device_config = BatteryManagerState().device_config
+    state = BatteryManagerState()
+    plug_manufacturer_map = state.plug_manufacturer_map
+    device_config = state.device_config
     if plug_name in plug_manufacturer_map:
         manufacturer = plug_manufacturer_map[plug_name]
         return device_config[manufacturer]
     return device_config[DEFAULT_CONFIG_TAG]
 
 
+ConfigSections = Dict[str, Dict[str, Optional[str]]]
+
+_SECTION_RE = re.compile(r'^\[([^\]]+)\]\s*$')
+_KV_RE = re.compile(r'^([^=:\s][^=:]*?)\s*[=:]\s*(.*?)\s*$')
+_NO_VALUE_RE = re.compile(r'^([^=:\s][^=:]*?)\s*$')
+
+# Parsed config files keyed by path, each entry is (st_mtime_ns, st_size, sections), see load_config()
+_config_cache: Dict[str, Tuple[int, int, ConfigSections]] = {}
+
+
+def _fast_ini(config_file_name: str) -> Optional[ConfigSections]:
+    '''
+    Minimal INI parser for the simple section + key = value files used here.
+    Mirrors the ConfigParser(allow_no_value=True) view used by verify_config_file: keys are lower cased,
+    a key without a value maps to None, DEFAULT is always present and its keys show up in every section.
+
+    Args:
+        config_file_name (str): name of full path to a config file
+
+    Returns:
+        Optional[ConfigSections]: parsed sections, None if the file uses syntax this parser does not handle
+    '''
+    sections: ConfigSections = {DEFAULT_CONFIG_TAG: {}}
+    section: Optional[Dict[str, Optional[str]]] = None
+    with open(config_file_name, 'r') as f:
+        for line in f:
+            if line[:1].isspace():
+                if line.strip():
+                    # continuation line
+                    return None
+                continue
+            line = line.rstrip()
+            if line[0] in '#;':
+                continue
+            match = _SECTION_RE.match(line)
+            if match:
+                if match.group(1) in sections and match.group(1) != DEFAULT_CONFIG_TAG:
+                    # duplicate section, let configparser report it
+                    return None
+                section = sections.setdefault(match.group(1), {})
+                continue
+            if section is None:
+                return None
+            match = _KV_RE.match(line) or _NO_VALUE_RE.match(line)
+            if not match:
+                return None
+            key = match.group(1).lower()
+            if key in section:
+                return None
+            section[key] = match.group(2) if match.lastindex == 2 else None
+    defaults = sections[DEFAULT_CONFIG_TAG]
+    if len(defaults) > 0:
+        for name, values in sections.items():
+            if name != DEFAULT_CONFIG_TAG:
+                sections[name] = {**defaults, **values}
+    return sections
+
+
+def load_config(config_file_name: str, st: Optional[os.stat_result] = None) -> ConfigSections:
+    '''
+    Parses a config file into plain dicts, reusing the previous result while the file's mtime and size are unchanged.
+    The fast parser handles the files this script uses, anything else falls back to configparser.
+    The returned dicts are shared and must be treated as read only.
+
+    Args:
+        config_file_name (str): name of full path to a config file
+        st (Optional[os.stat_result]): the caller's stat of config_file_name, saves another stat()
+
+    Returns:
+        ConfigSections: section name => {key: value}
+    '''
+    if st is None:
+        st = os.stat(config_file_name)
+    cached = _config_cache.get(config_file_name)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    sections = _fast_ini(config_file_name)
+    if sections is None:
+        config_parser = configparser.ConfigParser(allow_no_value=True)
+        config_parser.read(config_file_name)
+        sections = {name: dict(section) for name, section in config_parser.items()}
+    _config_cache[config_file_name] = (st.st_mtime_ns, st.st_size, sections)
+    return sections
+
+
+def _config_stat_key(config_file_name: str, st: os.stat_result) -> Tuple:
+    '''
+    Cheap key for the in process verify_config_file cache, built from the caller's stat()
+    '''
+    return (config_file_name, st.st_mtime_ns, st.st_size, BatteryManagerState().max_hours_to_run)
+
+
+def apply_verified_config(results: Tuple) -> None:
+    '''
+    Publishes cached verify_config_file results to BatteryManagerState
+
+    Args:
+        results (Tuple): (device_config, plug_manufacturer_map, plug_storage_list, plug_full_charge_list),
+            the sets are None when the config file has no such section
+    '''
+    BatteryManagerState().device_config.update(results[0])
+    BatteryManagerState().plug_manufacturer_map.update(results[1])
+    if results[2] is not None:
+        BatteryManagerState().plug_storage_list = results[2]
+    if results[3] is not None:
+        BatteryManagerState().plug_full_charge_list = results[3]
+
+
 def check_required_config_strings(config, required_tags: list, one_of_option_tag: list) -> bool:
     for string in required_tags:
         if string not in config:
@@ -1329,120 +1775,130 @@ def verify_config_file(config_file_name: str) -> bool:
     plug fails will use the DEFAULT thresholds
     On completion, the device_config dict will be filled in as much as possible except for the DEFAULT entry
 
+    Successful results are kept in BatteryManagerState().verified_config while the file's mtime and size are
+    unchanged, so an unchanged file is not parsed again.
+
     Args:
         config_file_name (str): name of full path to a config file
 
     Returns:
         bool: Normal exit indicating success in parsing the config file
     '''
+    if not config_file_name:
+        logger.error('>>>>> ERROR: empty config_file name')
+        return False
     plug_full_charge_list = BatteryManagerState().plug_full_charge_list
     plug_manufacturer_map = BatteryManagerState().plug_manufacturer_map
     device_config = BatteryManagerState().device_config
     plug_storage_list = BatteryManagerState().plug_storage_list
     try:
         verified = True
-        if isfile(config_file_name):
-            logger.info(f'>>>>> FOUND config_file: {config_file_name}')
-            config_parser = configparser.ConfigParser(allow_no_value=True)
-            config_parser.read(config_file_name)
-            manufacturers = list(config_parser.keys())
-            if CONFIG_PLUGS_SECTION in manufacturers:
-                manufacturers.remove(CONFIG_PLUGS_SECTION)
-            if CONFIG_STORAGE_SECTION in manufacturers:
-                manufacturers.remove(CONFIG_STORAGE_SECTION)
-            if CONFIG_FULL_CHARGE_SECTION in manufacturers:
-                manufacturers.remove(CONFIG_FULL_CHARGE_SECTION)
+        # a single stat() serves the existence check, the cache key and load_config()
+        try:
+            st = os.stat(config_file_name)
+        except OSError:
+            st = None
+        if st is not None and S_ISREG(st.st_mode):
+            logger.info('>>>>> FOUND config_file: %s', config_file_name)
+            stat_key = _config_stat_key(config_file_name, st)
+            verified_config = BatteryManagerState().verified_config
+            if verified_config is not None and verified_config[0] == stat_key:
+                apply_verified_config(verified_config[1])
+                return True
+            config_parser = load_config(config_file_name, st)
+            sections = config_parser.keys()
+            manufacturers = [section for section in sections if section not in RESERVED_CONFIG_SECTIONS]
+            parsed_device_config: Dict[str, DeviceConfig] = {}
             # Extract manufacture specific DeviceConfig here
             for manufacturer in manufacturers:
+                section = config_parser[manufacturer]
                 #  valid manufacturer, validate the mandatory_config_manufacturer_tags
-                if check_required_config_strings(config_parser[manufacturer], MANDATORY_CONFIG_MANUFACTURER_TAGS, ONE_OF_CONFIG_MANUFACTURER_TAGS):
-                    if NOMINAL_START_THRESHOLD_TAG in config_parser[manufacturer]:
-                        nominal_charge_start_power_threshold = float(
-                            config_parser[manufacturer][NOMINAL_START_THRESHOLD_TAG])
-                        if NOMINAL_STOP_THRESHOLD_TAG in config_parser[manufacturer]:
-                            nominal_charge_stop_power_threshold = float(
-                                config_parser[manufacturer][NOMINAL_STOP_THRESHOLD_TAG])
+                if check_required_config_strings(section, MANDATORY_CONFIG_MANUFACTURER_TAGS, ONE_OF_CONFIG_MANUFACTURER_TAGS):
+                    nominal_start = section.get(NOMINAL_START_THRESHOLD_TAG)
+                    nominal_stop = section.get(NOMINAL_STOP_THRESHOLD_TAG)
+                    if nominal_start is not None:
+                        nominal_charge_start_power_threshold = float(nominal_start)
+                        if nominal_stop is not None:
+                            nominal_charge_stop_power_threshold = float(nominal_stop)
                         else:
                             nominal_charge_stop_power_threshold = nominal_charge_start_power_threshold
-                    elif NOMINAL_STOP_THRESHOLD_TAG in config_parser[manufacturer]:
-                        nominal_charge_stop_power_threshold = float(
-                            config_parser[manufacturer][NOMINAL_STOP_THRESHOLD_TAG])
+                    elif nominal_stop is not None:
+                        nominal_charge_stop_power_threshold = float(nominal_stop)
                         nominal_charge_start_power_threshold = nominal_charge_stop_power_threshold
                     else:
                         nominal_charge_start_power_threshold = NOMINAL_CHARGE_START_THRESHOLD_DEFAULT
                         nominal_charge_stop_power_threshold = NOMINAL_CHARGE_STOP_THRESHOLD_DEFAULT
-                    if STORAGE_CHARGE_STOP_THRESHOLD_TAG in config_parser[manufacturer]:
-                        storage_charge_stop_power_threshold = float(
-                            config_parser[manufacturer][STORAGE_CHARGE_STOP_THRESHOLD_TAG])
-                    else:
-                        storage_charge_stop_power_threshold = STORAGE_CHARGE_STOP_THRESHOLD_DEFAULT
-                    if STORAGE_CHARGE_START_THRESHOLD_TAG in config_parser[manufacturer]:
-                        storage_charge_start_power_threshold = float(
-                            config_parser[manufacturer][STORAGE_CHARGE_START_THRESHOLD_TAG])
-                    else:
-                        storage_charge_start_power_threshold = storage_charge_stop_power_threshold
-                    if STORAGE_CHARGE_CYCLE_LIMIT_TAG in config_parser[manufacturer]:
-                        storage_charge_cycle_limit = int(
-                            config_parser[manufacturer][STORAGE_CHARGE_CYCLE_LIMIT_TAG])
-                    else:
-                        storage_charge_cycle_limit = STORAGE_CHARGE_CYCLE_LIMIT_DEFAULT
-                    charger_amp_hour_rate = float(
-                        config_parser[manufacturer][CHARGER_AMP_HOUR_RATE_TAG]) if CHARGER_AMP_HOUR_RATE_TAG in config_parser[manufacturer] else 0.0
-                    battery_amp_hour_capacity = float(
-                        config_parser[manufacturer][BATTERY_AMP_HOUR_CAPACITY_TAG]) if BATTERY_AMP_HOUR_CAPACITY_TAG in config_parser[manufacturer] else 0.0
+                    storage_stop = section.get(STORAGE_CHARGE_STOP_THRESHOLD_TAG)
+                    storage_charge_stop_power_threshold = float(storage_stop) if storage_stop is not None else STORAGE_CHARGE_STOP_THRESHOLD_DEFAULT
+                    storage_start = section.get(STORAGE_CHARGE_START_THRESHOLD_TAG)
+                    storage_charge_start_power_threshold = float(storage_start) if storage_start is not None else storage_charge_stop_power_threshold
+                    cycle_limit = section.get(STORAGE_CHARGE_CYCLE_LIMIT_TAG)
+                    storage_charge_cycle_limit = int(cycle_limit) if cycle_limit is not None else STORAGE_CHARGE_CYCLE_LIMIT_DEFAULT
+                    amp_hour_rate = section.get(CHARGER_AMP_HOUR_RATE_TAG)
+                    charger_amp_hour_rate = float(amp_hour_rate) if amp_hour_rate is not None else 0.0
+                    amp_hour_capacity = section.get(BATTERY_AMP_HOUR_CAPACITY_TAG)
+                    battery_amp_hour_capacity = float(amp_hour_capacity) if amp_hour_capacity is not None else 0.0
                     charger_max_hours_to_run = ceil(
                         battery_amp_hour_capacity / charger_amp_hour_rate) if charger_amp_hour_rate > 0.0 and battery_amp_hour_capacity > 0.0 else BatteryManagerState().max_hours_to_run
-                    battery_voltage = float(
-                        config_parser[manufacturer][BATTERY_VOLTAGE_TAG]) if BATTERY_VOLTAGE_TAG in config_parser[manufacturer] else None
-                    charger_efficiency = float(
-                        config_parser[manufacturer][CHARGER_EFFICIENCY_TAG]) if CHARGER_EFFICIENCY_TAG in config_parser[manufacturer] else CHARGER_EFFICIENCY
-                    device_config[manufacturer] = DeviceConfig(manufacturer,
-                                                                       nominal_charge_start_power_threshold,
-                                                                       nominal_charge_stop_power_threshold,
-                                                                       float(
-                                                                           config_parser[manufacturer][FULL_CHARGE_THRESHOLD_TAG]),
-                                                                       storage_charge_start_power_threshold,
-                                                                       storage_charge_stop_power_threshold,
-                                                                       storage_charge_cycle_limit,
-                                                                       float(config_parser[manufacturer][COARSE_PROBE_THRESHOLD_MARGIN_TAG]),
-                                                                       charger_amp_hour_rate,
-                                                                       battery_amp_hour_capacity,
-                                                                       charger_max_hours_to_run,
-                                                                       battery_voltage,
-                                                                       charger_efficiency=charger_efficiency)
-
-            sections = list(config_parser.keys())
+                    voltage = section.get(BATTERY_VOLTAGE_TAG)
+                    battery_voltage = float(voltage) if voltage is not None else None
+                    efficiency = section.get(CHARGER_EFFICIENCY_TAG)
+                    charger_efficiency = float(efficiency) if efficiency is not None else CHARGER_EFFICIENCY
+                    manufacturer_config = DeviceConfig(manufacturer,
+                                                       nominal_charge_start_power_threshold,
+                                                       nominal_charge_stop_power_threshold,
+                                                       float(section[FULL_CHARGE_THRESHOLD_TAG]),
+                                                       storage_charge_start_power_threshold,
+                                                       storage_charge_stop_power_threshold,
+                                                       storage_charge_cycle_limit,
+                                                       float(section[COARSE_PROBE_THRESHOLD_MARGIN_TAG]),
+                                                       charger_amp_hour_rate,
+                                                       battery_amp_hour_capacity,
+                                                       charger_max_hours_to_run,
+                                                       battery_voltage,
+                                                       charger_efficiency=charger_efficiency)
+                    # published as soon as it is parsed, so a later bad section still leaves this one in place
+                    device_config[manufacturer] = parsed_device_config[manufacturer] = manufacturer_config
+
+            parsed_plug_manufacturer_map: Dict[str, str] = {}
             if CONFIG_PLUGS_SECTION in sections:
+                manufacturer_names = frozenset(manufacturers)
                 for plug_name, manufacturer in config_parser[CONFIG_PLUGS_SECTION].items():
-                    if not manufacturer in manufacturers:
+                    if not manufacturer in manufacturer_names:
                         logger.error(
-                            f'>>>>> ERROR in verify_config_file, {manufacturer} not specified')
+                            '>>>>> ERROR in verify_config_file, %s not specified', manufacturer)
                         verified = False
-                        plug_manufacturer_map[plug_name] = DEFAULT_CONFIG_TAG
+                        parsed_plug_manufacturer_map[plug_name] = DEFAULT_CONFIG_TAG
                         continue
                     if manufacturer in device_config:
-                        plug_manufacturer_map[plug_name] = manufacturer
+                        parsed_plug_manufacturer_map[plug_name] = manufacturer
                     else:
-                        plug_manufacturer_map[plug_name] = DEFAULT_CONFIG_TAG
+                        parsed_plug_manufacturer_map[plug_name] = DEFAULT_CONFIG_TAG
+                plug_manufacturer_map.update(parsed_plug_manufacturer_map)
             # any plugs in storage mode?
             if CONFIG_STORAGE_SECTION in sections:
-                plug_storage_list = list(config_parser[CONFIG_STORAGE_SECTION])
+                plug_storage_list = frozenset(config_parser[CONFIG_STORAGE_SECTION])
                 BatteryManagerState().plug_storage_list = plug_storage_list
             if CONFIG_FULL_CHARGE_SECTION in sections:
-                full_charge_list = list(
-                    config_parser[CONFIG_FULL_CHARGE_SECTION])
-                plug_full_charge_list = list(
-                    set(full_charge_list) - set(plug_storage_list))
+                # storage wins over full charge for plugs listed in both sections
+                plug_full_charge_list = frozenset(
+                    plug_name for plug_name in config_parser[CONFIG_FULL_CHARGE_SECTION] if plug_name not in plug_storage_list)
                 BatteryManagerState().plug_full_charge_list = plug_full_charge_list
+            if verified:
+                results = (parsed_device_config,
+                           parsed_plug_manufacturer_map,
+                           plug_storage_list if CONFIG_STORAGE_SECTION in sections else None,
+                           plug_full_charge_list if CONFIG_FULL_CHARGE_SECTION in sections else None)
+                BatteryManagerState().verified_config = (stat_key, results)
         else:
             logger.error(
-                f'>>>>> ERROR: specified config_file: {config_file_name} does not exist')
+                '>>>>> ERROR: specified config_file: %s does not exist', config_file_name)
             return False
     # Bad form but we want to absolutely return True or False from this function and any exception => False
     except Exception as e:
         logger.error(
-            f'FATAL ERROR: Exception in verify_config_file({config_file_name}): {str(e)}')
-        config_parser = None
+            'FATAL ERROR: Exception in verify_config_file(%s): %s', config_file_name, e)
+        verified = False
 
     return verified
 
@@ -1452,11 +1908,75 @@ ancillary email functions
 '''
 
 
+class SmtpPool():
+    '''
+    Keeps one authenticated SMTP connection open across sends so each report does not pay for
+    a new TCP + TLS + AUTH handshake.  The connection is opened lazily on the first send, checked
+    with NOOP before reuse and reopened if the server dropped it.
+    '''
+    host: str
+    port: int
+    _connection: Optional['smtplib.SMTP']
+    _login: Optional[Tuple[str, str]]
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self._connection = None
+        self._login = None
+
+    def _connect(self, from_addr: str, app_key: str) -> 'smtplib.SMTP':
+        import smtplib
+        connection = smtplib.SMTP(self.host, self.port)
+        # starttls() and login() send EHLO themselves when it is needed
+        connection.starttls()
+        connection.login(from_addr, app_key)
+        self._connection = connection
+        self._login = (from_addr, app_key)
+        return connection
+
+    def _get_connection(self, from_addr: str, app_key: str) -> 'smtplib.SMTP':
+        import smtplib
+        if self._connection is not None and self._login == (from_addr, app_key):
+            try:
+                if self._connection.noop()[0] == 250:
+                    return self._connection
+            except (smtplib.SMTPException, OSError):
+                pass
+        self.quit()
+        return self._connect(from_addr, app_key)
+
+    def send(self, from_addr: str, to_addr: str, app_key: str, msg: 'EmailMessage') -> None:
+        import smtplib
+        connection = self._get_connection(from_addr, app_key)
+        try:
+            connection.send_message(msg, from_addr, to_addr)
+        except smtplib.SMTPServerDisconnected:
+            # dropped between the NOOP and the send, retry once on a fresh connection
+            self._connection = None
+            self._connect(from_addr, app_key).send_message(msg, from_addr, to_addr)
+
+    def quit(self) -> None:
+        if self._connection is None:
+            return
+        import smtplib
+        try:
+            self._connection.quit()
+        except (smtplib.SMTPException, OSError):
+            self._connection.close()
+        finally:
+            self._connection = None
+
+
+smtp_pool = SmtpPool(SMTP_HOST, SMTP_PORT)
+
+
 def send(from_addr, to_addr, app_key, msg) -> None:
     '''
     Constructs and sends email of log via SMTP for gmail.
     Must have an app_key
     Interested in different email, rewrite this.
+    Uses the shared smtp_pool connection.
 
     Args:
         from_addr (_type_): _description_
@@ -1464,41 +1984,54 @@ def send(from_addr, to_addr, app_key, msg) -> None:
         app_key (_type_): _description_
         msg (_type_): _description_
     '''
+    import smtplib
     try:
-        logger.info(f'[EMAIL] send')
-        smtpobj = smtplib.SMTP('smtp.gmail.com', 587)
-        smtpobj.ehlo()
-        smtpobj.starttls()
-        smtpobj.ehlo()
-        smtpobj.login(from_addr, app_key)
-        smtpobj.sendmail(from_addr, to_addr, msg.as_string())
-        smtpobj.close()
-        logger.info(f'[EMAIL] sent')
+        logger.info('[EMAIL] send')
+        smtp_pool.send(from_addr, to_addr, app_key, msg)
+        logger.info('[EMAIL] sent')
     except smtplib.SMTPException as e:
-        logger.error(f'MAIL SMTP ERROR: Unable to send mail: {str(e)}')
+        logger.error('MAIL SMTP ERROR: Unable to send mail: %s', e)
     except Exception as e:
-        logger.error(f'MAIL General ERROR: Unexpected Exception in send: Unable to send mail: {str(e)}')
+        logger.error('MAIL General ERROR: Unexpected Exception in send: Unable to send mail: %s', e)
 
 
 def send_my_mail(email: str, app_key: str, log_file: str) -> None:
     if email == None or app_key == None:
         print('Email args missing not sending')
     else:
+        from email.message import EmailMessage
         try:
-            logger.info(f'[EMAIL] send_my_mail')
-            # Create a text/plain message
-            with open(log_file, 'r') as f:
-                msg = EmailMessage()
-
-                f.seek(0)
-                msg.set_content(f.read())
-
-                # me == the sender's email address
-                # you == the recipient's email address
-                msg['Subject'] = f'battery_plug_controller status'
-                msg['From'] = f'{email}'
-                msg['To'] = f'{email}'
-                send(email, email, app_key, msg)
+            logger.info('[EMAIL] send_my_mail')
+            msg = EmailMessage()
+            log_size = os.path.getsize(log_file)
+            if log_size <= EMAIL_INLINE_LOG_MAX_BYTES:
+                # Create a text/plain message
+                with open(log_file, 'r', buffering=1 << 16) as f:
+                    msg.set_content(f.read())
+            else:
+                # Long runs can produce large logs.  The end of the log, with the run summary, goes inline
+                # and the whole log is attached, compressed a block at a time rather than read in one piece
+                import gzip
+                import io
+                import shutil
+                log_data = io.BytesIO()
+                with open(log_file, 'rb') as f:
+                    with gzip.GzipFile(filename=os.path.basename(log_file), mode='wb', fileobj=log_data) as gz:
+                        shutil.copyfileobj(f, gz, 1 << 16)
+                    f.seek(log_size - EMAIL_INLINE_LOG_TAIL_BYTES)
+                    # drop the partial first line
+                    tail = f.read().split(b'\n', 1)[-1].decode('utf-8', errors='replace')
+                msg.set_content(f'Log file is larger than {EMAIL_INLINE_LOG_MAX_BYTES} bytes, the full log is attached.\n'
+                                f'End of the log:\n\n{tail}')
+                msg.add_attachment(log_data.getvalue(), maintype='application', subtype='gzip',
+                                   filename=f'{os.path.basename(log_file)}.gz')
+
+            # me == the sender's email address
+            # you == the recipient's email address
+            msg['Subject'] = f'battery_plug_controller status'
+            msg['From'] = f'{email}'
+            msg['To'] = f'{email}'
+            send(email, email, app_key, msg)
         except IOError:
             print(f'ERROR [send_my_mail] -- Could not read file: {log_file}')
         except Exception:
@@ -1515,42 +2048,45 @@ async def test_stuff() -> None:
     battery_plug_list = []
     test_remove = []
     found = await Discover.discover()
-    for dev in found.values():
-        await dev.update()
+    devices = list(found.values())
+    # one round trip for all the devices rather than one after another
+    await asyncio.gather(*(update_device(dev) for dev in devices))
+    now = datetime.now()
+    for dev in devices:
         if dev.is_plug:
             if BATTERY_PREFIX in dev.alias:
                 battery_plug = BatteryPlug(
-                    dev.alias, dev, max_cycles_in_fine_mode)
+                    dev.alias, dev, max_cycles_in_fine_mode, get_device_config(dev.alias), now)
                 # logger.info(f'dir: {str(dir(battery_plug))}')
-                logger.info(
-                    f'plug: {battery_plug.name}, power: {str(battery_plug.get_power())}')
+                if logger.isEnabledFor(logging.INFO):
+                    # get_power() is only worth calling when the line is logged
+                    logger.info('plug: %s, power: %s', battery_plug.name, battery_plug.get_power())
                 battery_plug_list.append(battery_plug)
         if dev.is_strip:
-            logger.info(f'test_stuff: dev.children: {len(dev.children)}')
-            index = 0
-            for child_plug in dev.children:
-                if BATTERY_PREFIX in child_plug.alias:
-                    battery_plug = BatteryStripPlug(
-                        child_plug.alias, dev, index, max_cycles_in_fine_mode)
-                    # logger.info(f'child_plug:dir: {str(dir(battery_plug))}')
-                    # logger.info(f'child_plug: {battery_plug.get_name()}, power: {str(battery_plug.get_power())}')
-                    logger.info(
-                        f'child_plug: {battery_plug.name}, power: {str(battery_plug.get_power())}')
-                    battery_plug_list.append(battery_plug)
-                    if len(test_remove) < 3:
-                        test_remove.append(battery_plug)
-                index = index + 1
-    logger.info(
-        f'test_stuff: battery_plug_list: len: {len(battery_plug_list), {str(battery_plug_list)}}')
+            logger.info('test_stuff: dev.children: %s', len(dev.children))
+            for index, child_plug in enumerate(dev.children):
+                if BATTERY_PREFIX not in child_plug.alias:
+                    continue
+                battery_plug = BatteryStripPlug(
+                    child_plug.alias, dev, index, max_cycles_in_fine_mode, get_device_config(child_plug.alias), now)
+                # logger.info(f'child_plug:dir: {str(dir(battery_plug))}')
+                # logger.info(f'child_plug: {battery_plug.get_name()}, power: {str(battery_plug.get_power())}')
+                if logger.isEnabledFor(logging.INFO):
+                    # get_power() is only worth calling when the line is logged
+                    logger.info('child_plug: %s, power: %s', battery_plug.name, battery_plug.get_power())
+                battery_plug_list.append(battery_plug)
+                if len(test_remove) < 3:
+                    test_remove.append(battery_plug)
+    logger.info('test_stuff: battery_plug_list: len: %s %s', len(battery_plug_list), battery_plug_list)
     # for item in test_remove:
     #     battery_plug_list.remove(item)
     # logger.info(f'test_stuff: after remove: battery_plug_list: len: {len(battery_plug_list), {str(battery_plug_list)}}')
-    for item in battery_plug_list:
-        await item.turn_off()
-        logger.info(
-            f'iterate: name: {item.name} on: {str(item.is_on())}, power: {str(item.get_power())}')
-        logger.info(
-            f'iterate: name: {item.name} on: {str(item.is_on())}, power: {str(item.get_power())}')
+    results = await turn_off_plugs(battery_plug_list)
+    for item, result in zip(battery_plug_list, results):
+        if result is not None:
+            logger.error('iterate: name: %s turn_off failed: %s', item.name, result)
+            continue
+        logger.info('iterate: name: %s on: %s, power: %s', item.name, item.is_on(), item.get_power())
 
 
 def start_quiet_mode() -> None:
@@ -1570,80 +2106,82 @@ def force_log(log: str) -> None:
     # logging.getLogger("").setLevel(log_level)
 
 
+# log_start_state logs each manufacturer's thresholds as one record in this format
+MANUFACTURER_CONFIG_LOG_FORMAT = '\n'.join((
+    '  ---- manufacturer: %s',
+    '  -------- nominal_charge_start_power_threshold: %s',
+    '  -------- nominal_charge_stop_power_threshold: %s',
+    '  -------- full_charge_power_threshold: %s',
+    '  -------- storage_charge_start_power_threshold: %s',
+    '  -------- storage_charge_stop_power_threshold: %s',
+    '  -------- storage_charge_cycle_limit: %s',
+    '  -------- charger_amp_hour_rate: %s',
+    '  -------- battery_amp_hour_capacity: %s',
+    '  -------- charger_max_hours_to_run: %s',
+    '  -------- battery_voltage: %s',
+    '  -------- charger_efficiency: %s'))
+
+
 def log_start_state(max_hours_to_run: int,
                            log_file: str,
                            config_file: str,
                            test_mode: bool,
                            config_file_is_valid: bool
                            ) -> None:
-    if BatteryManagerState().logging_mode == LoggingMode.SUPER_QUIET:
+    state = BatteryManagerState()
+    if state.logging_mode == LoggingMode.SUPER_QUIET:
         # Even in SUPER_QUIET, forcing a full charge is important to know
-        if BatteryManagerState().force_full_charge:
-            logger.info(f'  ---- force_full_charge: True')
+        if state.force_full_charge:
+            logger.info('  ---- force_full_charge: True')
         return
-    device_config = BatteryManagerState().device_config
-    default_config: DeviceConfig = BatteryManagerState().default_config
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    device_config = state.device_config
+    default_config: DeviceConfig = state.default_config
+    info = logger.info
 
     if test_mode:
-        logger.info(f'  ---- test_mode: {str(test_mode)}')
-    logger.info(f'  ---- quiet_mode: {str(BatteryManagerState().quiet_mode)}')
-    if BatteryManagerState().force_full_charge:
-        logger.info(f'  ---- force_full_charge: {str(BatteryManagerState().force_full_charge)}')
-        logger.info(
-            f'  ---- full_charge_repeat_limit: {str(BatteryManagerState().full_charge_repeat_limit)}')
-    logger.info(
-        f'  ---- max_cycles_in_fine_mode: {str(BatteryManagerState().max_cycles_in_fine_mode)}')
-    logger.info(f'  ---- max_hours_to_run: {str(max_hours_to_run)}')
-    logger.info(f'  ---- logfile: {str(log_file)}')
-    logger.info(f'  ---- config_file: {str(config_file)}')
-    logger.info(f'  ---- DEFAULT config')
-    logger.info(
-        f'  -------- nominal_charge_start_power_threshold: {str(default_config.nominal_charge_start_power_threshold)}')
-    logger.info(
-        f'  -------- nominal_charge_stop_power_threshold: {str(default_config.nominal_charge_stop_power_threshold)}')
-    logger.info(
-        f'  -------- full_charge_power_threshold: {str(default_config.full_charge_power_threshold)}')
-    logger.info(
-        f'  -------- storage_charge_start_power_threshold: {str(default_config.storage_charge_start_power_threshold)}')
-    logger.info(
-        f'  -------- storage_charge_stop_power_threshold: {str(default_config.storage_charge_stop_power_threshold)}')
-    logger.info(
-        f'  -------- storage_charge_cycle_limit: {str(BatteryManagerState().storage_charge_cycle_limit)}')
-    logger.info(
-        f'  -------- scan_for_battery_prefix: {BatteryManagerState().scan_for_battery_prefix}')
-    logger.info(
-        f'  -------- charger_efficiency: {str(default_config.charger_efficiency)}')
+        info('  ---- test_mode: %s', test_mode)
+    info('  ---- quiet_mode: %s', state.quiet_mode)
+    if state.force_full_charge:
+        info('  ---- force_full_charge: %s', state.force_full_charge)
+        info('  ---- full_charge_repeat_limit: %s', state.full_charge_repeat_limit)
+    info('  ---- max_cycles_in_fine_mode: %s', state.max_cycles_in_fine_mode)
+    info('  ---- max_hours_to_run: %s', max_hours_to_run)
+    info('  ---- logfile: %s', log_file)
+    info('  ---- config_file: %s', config_file)
+    info('  ---- DEFAULT config')
+    info('  -------- nominal_charge_start_power_threshold: %s', default_config.nominal_charge_start_power_threshold)
+    info('  -------- nominal_charge_stop_power_threshold: %s', default_config.nominal_charge_stop_power_threshold)
+    info('  -------- full_charge_power_threshold: %s', default_config.full_charge_power_threshold)
+    info('  -------- storage_charge_start_power_threshold: %s', default_config.storage_charge_start_power_threshold)
+    info('  -------- storage_charge_stop_power_threshold: %s', default_config.storage_charge_stop_power_threshold)
+    info('  -------- storage_charge_cycle_limit: %s', state.storage_charge_cycle_limit)
+    info('  -------- scan_for_battery_prefix: %s', state.scan_for_battery_prefix)
+    info('  -------- charger_efficiency: %s', default_config.charger_efficiency)
     if config_file_is_valid:
-        logger.info(f'  ---- MANUFACTURER specific thresholds')
-        for manufacturer in device_config:
-            if manufacturer == "DEFAULT":
+        info('  ---- MANUFACTURER specific thresholds')
+        for manufacturer, config in device_config.items():
+            if manufacturer == DEFAULT_CONFIG_TAG:
                 continue
-            logger.info(f'  ---- manufacturer: {str(manufacturer)}')
-            logger.info(
-                f'  -------- nominal_charge_start_power_threshold: {str(device_config[manufacturer].nominal_charge_start_power_threshold)}')
-            logger.info(
-                f'  -------- nominal_charge_stop_power_threshold: {str(device_config[manufacturer].nominal_charge_stop_power_threshold)}')
-            logger.info(
-                f'  -------- full_charge_power_threshold: {str(device_config[manufacturer].full_charge_power_threshold)}')
-            logger.info(
-                f'  -------- storage_charge_start_power_threshold: {str(device_config[manufacturer].storage_charge_start_power_threshold)}')
-            logger.info(
-                f'  -------- storage_charge_stop_power_threshold: {str(device_config[manufacturer].storage_charge_stop_power_threshold)}')
-            logger.info(
-                f'  -------- storage_charge_cycle_limit: {str(device_config[manufacturer].storage_charge_cycle_limit)}')
-            logger.info(
-                f'  -------- charger_amp_hour_rate: {str(device_config[manufacturer].charger_amp_hour_rate) if device_config[manufacturer].charger_amp_hour_rate > 0.0 else "N/A"}')
-            logger.info(
-                f'  -------- battery_amp_hour_capacity: {str(device_config[manufacturer].battery_amp_hour_capacity) if device_config[manufacturer].battery_amp_hour_capacity > 0.0 else "N/A"}')
-            logger.info(
-                f'  -------- charger_max_hours_to_run: {str(device_config[manufacturer].charger_max_hours_to_run)}')
-            logger.info(
-                f'  -------- battery_voltage: {str(device_config[manufacturer].battery_voltage)}')
-            logger.info(
-                f'  -------- charger_efficiency: {str(device_config[manufacturer].charger_efficiency)}')
-
-
-def log_actively_charging_plugs(active_plugs: Set[ActivePlug]) -> None:
+            # one record per manufacturer rather than one per threshold, INFO is formatted as the bare
+            # message so the log file reads the same as with one record per line
+            info(MANUFACTURER_CONFIG_LOG_FORMAT,
+                 manufacturer,
+                 config.nominal_charge_start_power_threshold,
+                 config.nominal_charge_stop_power_threshold,
+                 config.full_charge_power_threshold,
+                 config.storage_charge_start_power_threshold,
+                 config.storage_charge_stop_power_threshold,
+                 config.storage_charge_cycle_limit,
+                 config.charger_amp_hour_rate if config.charger_amp_hour_rate > 0.0 else 'N/A',
+                 config.battery_amp_hour_capacity if config.battery_amp_hour_capacity > 0.0 else 'N/A',
+                 config.charger_max_hours_to_run,
+                 config.battery_voltage,
+                 config.charger_efficiency)
+
+
+def log_actively_charging_plugs(active_plugs: Collection[ActivePlug]) -> None:
     if len(active_plugs) > 0:
         def get_total_amp_hours(plug: ActivePlug) -> float:
             return plug.plug.get_power_total()
@@ -1658,35 +2196,77 @@ def log_actively_charging_plugs(active_plugs: Set[ActivePlug]) -> None:
                 insert_sorted(sorted_active_plugs, plug, get_total_amp_hours)
 
         if len(sorted_active_plugs) == 0:
-            logger.info(f'No plugs were actively charging this run')
+            logger.info('No plugs were actively charging this run')
             return
         try:
-            logger.info(f'The following plugs were actively charging this run:')
-            start_threshold_logger.info(
-                f'The following plugs were actively charging this run:')
-            
+            # bound once, both loggers get every line of the summary
+            info = logger.info
+            debug_info = start_threshold_logger.info
+            info('The following plugs were actively charging this run:')
+            debug_info('The following plugs were actively charging this run:')
+
+            plug_name = 'unknown'
             for _, plug in sorted_active_plugs:
+                # bound before anything can raise, the except below reports it
+                plug_name = plug.plug.name
                 if plug.start_time and plug.stop_time:
                     plug_elapsed_charge_time = plug.stop_time - plug.start_time
                     total_seconds = int(plug_elapsed_charge_time.total_seconds())
                     hours = total_seconds // 3600
                     minutes = (total_seconds % 3600) // 60
                     seconds = total_seconds % 60
-                    plug_name = plug.plug.name
                     total_amp_hours = get_total_amp_hours(plug)
-                    logger.info(
-                        f'    {plug_name}, charged for {hours:02}:{minutes:02}:{seconds:02} added ~{total_amp_hours:.2f} Ah')
-                    start_threshold_logger.info(
-                        f'    {plug_name}, charged for {hours:02}:{minutes:02}:{seconds:02} added ~{total_amp_hours:.2f} Ah')
+                    line = f'    {plug_name}, charged for {hours:02}:{minutes:02}:{seconds:02} added ~{total_amp_hours:.2f} Ah'
                 else:
-                    logger.info(
-                        f'    {plug.plug_name}, charged for unknown duration')
-                    start_threshold_logger.info(
-                        f'    {plug.plug_name}, charged for unknown duration')
+                    line = f'    {plug_name}, charged for unknown duration'
+                info(line)
+                debug_info(line)
         except Exception as e:
-            logger.error(f'Exception in{fn_name()} for plug: {plug_name}: {str(e)}')
+            logger.error('Exception in log_actively_charging_plugs for plug: %s: %s', plug_name, e)
     else:
-        logger.info(f'No plugs were actively charging this run')
+        logger.info('No plugs were actively charging this run')
+
+
+# Event loop shared by run_battery_controller and exit_handler, see get_event_loop()
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    '''
+    Returns the event loop for this run, creating it on first use.
+    analyze_loop and the exit_handler shutdown both run on it, so the kasa connections opened
+    during the run are still usable when the plugs are shut down.
+    Uses uvloop when it is installed, otherwise the default asyncio loop.
+    On Python 3.12+ tasks are created eagerly, so plug RPCs that complete without suspending
+    skip the scheduler round-trip.
+
+    Returns:
+        asyncio.AbstractEventLoop: shared event loop
+    '''
+    global _event_loop
+    if _event_loop is None or _event_loop.is_closed():
+        _event_loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+        if hasattr(asyncio, 'eager_task_factory'):
+            _event_loop.set_task_factory(asyncio.eager_task_factory)
+        asyncio.set_event_loop(_event_loop)
+    return _event_loop
+
+
+def close_event_loop() -> None:
+    '''
+    Finalizes async generators and the default executor, then closes the shared event loop
+    '''
+    global _event_loop
+    loop = _event_loop
+    if loop is None or loop.is_closed() or loop.is_running():
+        return
+    try:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.run_until_complete(loop.shutdown_default_executor())
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+        _event_loop = None
 
 
 def run_battery_controller(max_hours_to_run: int,
@@ -1718,21 +2298,25 @@ def run_battery_controller(max_hours_to_run: int,
     '''
     global start_threshold_logger
 
-    start_threshold_logger.info(f"test test test")
-    start_threshold_logger.error(f"test test test")
+    start_threshold_logger.info("test test test")
+    start_threshold_logger.error("test test test")
 
-    plug_full_charge_list = BatteryManagerState().plug_full_charge_list
-    device_config = BatteryManagerState().device_config
-    plug_storage_list = BatteryManagerState().plug_storage_list
-    active_plugs: Set[ActivePlug] = BatteryManagerState().active_plugs
+    state = BatteryManagerState()
+    device_config = state.device_config
+    active_plugs: Dict[str, ActivePlug] = state.active_plugs
 
-    logger.info(f'Script logs are in {log_file}')
+    logger.info('Script logs are in %s', log_file)
     start = datetime.now()
+    # elapsed time comes from the monotonic clock so wall clock adjustments during a long run do not skew it
+    start_monotonic = monotonic()
+    deadline = start + timedelta(hours=max_hours_to_run)
 
     config_file_is_valid = False
-    if config_file != None:
+    if config_file is not None:
         config_file_is_valid = verify_config_file(config_file)
-    default_config: DeviceConfig = BatteryManagerState().default_config
+        if config_file_is_valid:
+            state.device_host_cache_file = config_file + DEVICE_HOST_CACHE_SUFFIX
+    default_config: DeviceConfig = state.default_config
     device_config[DEFAULT_CONFIG_TAG] = default_config
 
     log_start_state(max_hours_to_run=max_hours_to_run, 
@@ -1741,52 +2325,122 @@ def run_battery_controller(max_hours_to_run: int,
                     test_mode=test_mode, 
                     config_file_is_valid=config_file_is_valid)
     start_quiet_mode()
-    if len(plug_storage_list) > 0:
-        logger.info(f'  ---- plugs in storage mode: ')
-        for plug_name in plug_storage_list:
-            logger.info(f'      ---- plug name: {plug_name}')
-    if len(plug_full_charge_list) > 0:
-        logger.info(f'  ---- plugs in full charge mode: ')
-        for plug_name in plug_full_charge_list:
-            logger.info(f'      ---- plug name: {plug_name}')
+    # verify_config_file replaces these, so fetch them afterwards
+    plug_storage_list = state.plug_storage_list
+    plug_full_charge_list = state.plug_full_charge_list
+    if len(plug_storage_list) > 0 and logger.isEnabledFor(logging.INFO):
+        logger.info('  ---- plugs in storage mode: \n%s',
+                    '\n'.join(f'      ---- plug name: {plug_name}' for plug_name in sorted(plug_storage_list)))
+    if len(plug_full_charge_list) > 0 and logger.isEnabledFor(logging.INFO):
+        logger.info('  ---- plugs in full charge mode: \n%s',
+                    '\n'.join(f'      ---- plug name: {plug_name}' for plug_name in sorted(plug_full_charge_list)))
 
     if test_mode:
         # asyncio.run(test_stuff())
         return
 
-    success = asyncio.run(analyze_loop(
-        start + timedelta(hours=max_hours_to_run)))
-    stop = datetime.now()
-    elapsed_time = stop - start
+    success = get_event_loop().run_until_complete(analyze_loop(deadline))
+    # whole seconds, so the timedelta prints as H:MM:SS
+    elapsed_time = timedelta(seconds=int(monotonic() - start_monotonic))
     stop_quiet_mode()
-    logger.custom(f'>>>>> !!!! FINI: success: {str(success)} !!!! <<<<<')
-    log_actively_charging_plugs(active_plugs=active_plugs)
-    logger.info(f'==> Elapsed time: {str(elapsed_time).split(".", 2)[0]}')
+    logger.custom('>>>>> !!!! FINI: success: %s !!!! <<<<<', success)
+    log_actively_charging_plugs(active_plugs=active_plugs.values())
+    logger.info('==> Elapsed time: %s', elapsed_time)
 
+    flush_log_handlers()
     send_my_mail(email, app_key, log_file)
+    smtp_pool.quit()
+
+
+class BufferedFileHandler(logging.FileHandler):
+    '''
+    FileHandler that writes through a large buffer and only flushes on WARNING and above.
+    Lower level records are written out by flush_log_handlers() once per analyze pass, or when the buffer fills.
+    '''
+
+    def __init__(self, filename: str, mode: str = 'w') -> None:
+        super().__init__(filename, mode=mode, encoding='utf-8')
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=LOG_FILE_BUFFER_SIZE,
+                    encoding=self.encoding, errors=self.errors)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.WARNING:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+# Writes the log records on a background thread, see init_logging()
+class FlushingQueueListener(logging.handlers.QueueListener):
+    '''
+    QueueListener that also takes flush requests from flush_log_handlers() through its queue.
+    A request is handled after every record queued before it, so the listener thread keeps running.
+    '''
+
+    def handle(self, record: logging.LogRecord) -> None:
+        flushed: Optional[threading.Event] = getattr(record, 'flushed', None)
+        if flushed is None:
+            super().handle(record)
+            return
+        for handler in self.handlers:
+            handler.flush()
+        flushed.set()
+
+
+_log_listener: Optional[FlushingQueueListener] = None
+_log_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+def flush_log_handlers() -> None:
+    '''
+    Pushes any buffered log records to disk, e.g. before the log file is mailed
+    '''
+    if _log_listener is None:
+        for handler in logging.getLogger().handlers:
+            handler.flush()
+        return
+    flushed = threading.Event()
+    _log_listener.queue.put_nowait(logging.makeLogRecord({'flushed': flushed}))
+    flushed.wait(LOG_FLUSH_TIMEOUT_SECS)
+
+
+def stop_log_listener() -> None:
+    '''
+    Drains the log queue and moves its handlers back onto the root logger, so records logged
+    after this point (e.g. by exit_handler) are still written.  Registered with atexit below.
+    '''
+    global _log_listener, _log_queue_handler
+    if _log_listener is None:
+        return
+    root_logger = logging.getLogger('')
+    root_logger.removeHandler(_log_queue_handler)
+    _log_listener.stop()
+    for handler in _log_listener.handlers:
+        root_logger.addHandler(handler)
+    _log_listener = None
+    _log_queue_handler = None
+
+
+# once for the process, init_logging() may run more than once
+atexit.register(stop_log_listener)
 
 
 def setup_logging_handlers(log_file: str) -> list:
     try:
-        logging_file_handler = logging.FileHandler(filename=log_file, mode='w')
-    except (IOError, OSError, ValueError, FileNotFoundError) as e:
-        print(f'ERROR -- Could not create logging file: {log_file}, e: {str(e)}')
-        logging_handlers = [
-            logging.StreamHandler()
-        ]
-        return logging_handlers
+        logging_file_handler = BufferedFileHandler(log_file, mode='w')
     except Exception as e:
-        print(f'ERROR -- Unexpected Exception: Could not create logging file: {log_file}, e: {str(e)}')
-        logging_handlers = [
-            logging.StreamHandler()
-        ]
-        return logging_handlers
-
-    logging_handlers = [
-        logging_file_handler,
-        logging.StreamHandler()
-    ]
-    return logging_handlers
+        # OSError covers the usual failures (IOError and FileNotFoundError are OSError)
+        print(f'ERROR -- Could not create logging file: {log_file}, e: {e}')
+        return [logging.StreamHandler()]
+    return [logging_file_handler, logging.StreamHandler()]
 
 
 # Define formats
@@ -1821,6 +2475,7 @@ class CustomFormatter(logging.Formatter):
 
 
 def init_logging() -> logging.Logger:
+    global _log_listener, _log_queue_handler
     logging.addLevelName(CUSTOM_LEVEL_NUM, CUSTOM_LEVEL_NAME)
     logging.Logger.custom = custom
     logger = logging.getLogger('')
@@ -1829,119 +2484,77 @@ def init_logging() -> logging.Logger:
     logging_handlers = setup_logging_handlers(BatteryManagerState().log_file)
     for handler in logging_handlers:
         handler.setFormatter(formatter)
-        logger.addHandler(handler)
+    # The file and console writes run on the listener thread so logging never blocks the event loop
+    stop_log_listener()
+    log_queue = queue.SimpleQueue()
+    _log_listener = FlushingQueueListener(log_queue, *logging_handlers, respect_handler_level=True)
+    _log_listener.start()
+    _log_queue_handler = logging.handlers.QueueHandler(log_queue)
+    logger.addHandler(_log_queue_handler)
     return logger
 
 def exit_handler():
     """
     This function is registered with atexit to handle graceful shutdown of async tasks.
-    It attempts to get the current event loop, and if successful, it runs the shutdown_plugs
-    coroutine within that loop. If the loop is not running, it creates a new event loop
-    to run the shutdown_plugs coroutine.
+    It runs the shutdown_plugs coroutine on the shared event loop used by run_battery_controller,
+    scheduling it if that loop is still running, then closes the loop.
     """
+    if logger is None:
+        # exited before logging was set up (e.g. argparse rejected an argument), no plugs to shut down
+        return
     logger.info("Executing exit_handler")
 
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            logger.info("Running shutdown_plugs within the current event loop")
-            loop.create_task(shutdown_plugs())
-        else:
-            logger.info("Running shutdown_plugs in the existing event loop")
-            loop.run_until_complete(shutdown_plugs())
-    except RuntimeError as e:
-        logger.error(f"Failed to get event loop: {e}")
-        # Create a new event loop if the current one is not available
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        logger.info("Running shutdown_plugs in a new event loop")
+        asyncio.get_running_loop().create_task(shutdown_plugs())
+        logger.info("Running shutdown_plugs within the current event loop")
+        return
+    except RuntimeError:
+        # the usual case, no loop is running at exit
+        pass
+
+    try:
+        loop = get_event_loop()
+        logger.info("Running shutdown_plugs in the existing event loop")
         loop.run_until_complete(shutdown_plugs())
-        loop.close()
+        close_event_loop()
+    except RuntimeError as e:
+        logger.error("Failed to run shutdown_plugs: %s", e)
+        return
 
     logger.info("Event loop closed")
 
+# (argparse dest, BatteryManagerState attribute, converter, name used in the error message)
+OVERRIDE_ARGS = (
+    ('scan_for_battery_prefix', 'scan_for_battery_prefix', bool, 'scan_for_battery_prefix'),
+    ('nominal_start_charge_threshold', 'nominal_charge_start_power_threshold', float, 'nominal_charge_start_charge_threshold'),
+    ('nominal_charge_cutoff', 'nominal_charge_stop_power_threshold', float, 'nominal_charge_stop_power_threshold'),
+    ('full_charge_cutoff', 'full_charge_power_threshold', float, 'full_charge_power_threshold'),
+    ('storage_start_charge_threshold', 'storage_charge_start_power_threshold', float, 'storage_charge_start_power_threshold'),
+    ('storage_charge_cutoff', 'storage_charge_stop_power_threshold', float, 'storage_charge_stop_power_threshold'),
+    ('full_charge_repeat_limit', 'full_charge_repeat_limit', int, 'full_charge_repeat_limit'),
+    ('max_cycles_in_fine_mode', 'max_cycles_in_fine_mode', int, 'max_cycles_in_fine_mode'),
+    ('storage_charge_cycle_limit', 'storage_charge_cycle_limit', int, 'storage_charge_cycle_limit'),
+    ('max_hours_to_run', 'max_hours_to_run', int, 'max_hours_to_run'),
+)
+
+
 def process_overrides(args) -> None:
-    if args.scan_for_battery_prefix != None and args.scan_for_battery_prefix == True:
-        try:
-            scan_for_battery_prefix = bool(
-                args.scan_for_battery_prefix)
-            logger.info(
-                f'>>>>> OVERRIDE scan_for_battery_prefix: {str(scan_for_battery_prefix)}')
-        except (ValueError, TypeError, OverflowError) as e:
-            logger.error(f'ERROR, Invalid scan_for_battery_prefix: {str(e)}')
-    if args.nominal_start_charge_threshold != None:
-        try:
-            nominal_charge_start_power_threshold = float(
-                args.nominal_start_charge_threshold)
-            logger.info(
-                f'>>>>> OVERRIDE nominal_charge_start_power_threshold: {str(nominal_charge_start_power_threshold)}')
-        except (ValueError, TypeError, OverflowError) as e:
-            logger.error(f'ERROR, Invalid nominal_charge_start_charge_threshold: {str(e)}')
-    if args.nominal_charge_cutoff != None:
-        try:
-            nominal_charge_stop_power_threshold = float(
-                args.nominal_charge_cutoff)
-            logger.info(
-                f'>>>>> OVERRIDE nominal_charge_stop_power_threshold: {str(nominal_charge_stop_power_threshold)}')
-        except (ValueError, TypeError, OverflowError) as e:
-            logger.error(f'ERROR, Invalid nominal_charge_stop_power_threshold: {str(e)}')
-    if args.full_charge_cutoff != None:
-        try:
-            full_charge_power_threshold = float(
-                args.full_charge_cutoff)
-            logger.info(
-                f'>>>>> OVERRIDE full_charge_power_threshold: {str(full_charge_power_threshold)}')
-        except (ValueError, TypeError, OverflowError) as e:
-            logger.error(f'ERROR, Invalid full_charge_power_threshold: {str(e)}')
-    if args.storage_start_charge_threshold != None:
-        try:
-            storage_charge_start_power_threshold = float(
-                args.storage_start_charge_threshold)
-            logger.info(
-                f'>>>>> OVERRIDE storage_charge_start_power_threshold: {str(storage_charge_start_power_threshold)}')
-        except (ValueError, TypeError, OverflowError) as e:
-            logger.error(f'ERROR, Invalid storage_charge_start_power_threshold: {str(e)}')
-    if args.storage_charge_cutoff != None:
-        try:
-            storage_charge_stop_power_threshold = float(
-                args.storage_charge_cutoff)
-            logger.info(
-                f'>>>>> OVERRIDE storage_charge_stop_power_threshold: {str(storage_charge_stop_power_threshold)}')
-        except (ValueError, TypeError, OverflowError) as e:
-            logger.error(f'ERROR, Invalid storage_charge_stop_power_threshold: {str(e)}')
-    if args.full_charge_repeat_limit != None:
-        try:
-            BatteryManagerState().full_charge_repeat_limit = args.full_charge_repeat_limit
-            logger.info(
-                f'>>>>> OVERRIDE full_charge_repeat_limit: {str(BatteryManagerState().full_charge_repeat_limit)}')
-        except (ValueError, TypeError, OverflowError) as e:
-            logger.error(f'ERROR, Invalid full_charge_repeat_limit: {str(e)}')
-    if args.max_cycles_in_fine_mode != None:
-        try:
-            BatteryManagerState().max_cycles_in_fine_mode = args.max_cycles_in_fine_mode
-            logger.info(
-                f'>>>>> OVERRIDE max_cycles_in_fine_mode: {str(BatteryManagerState().max_cycles_in_fine_mode)}')
-        except (ValueError, TypeError, OverflowError) as e:
-            logger.error(f'ERROR, Invalid max_cycles_in_fine_mode: {str(e)}')
-    if args.storage_charge_cycle_limit != None:
-        try:
-            BatteryManagerState().storage_charge_cycle_limit = args.storage_charge_cycle_limit
-            logger.info(
-                f'>>>>> OVERRIDE storage_charge_cycle_limit: {str(BatteryManagerState().storage_charge_cycle_limit)}')
-        except (ValueError, TypeError, OverflowError) as e:
-            logger.error(f'ERROR, Invalid storage_charge_cycle_limit: {str(e)}')
-    if args.max_hours_to_run != None:
+    state = BatteryManagerState()
+    for arg_name, attr_name, converter, error_name in OVERRIDE_ARGS:
+        value = getattr(args, arg_name, None)
+        # store_true flags are False when not given
+        if value is None or value is False:
+            continue
         try:
-            BatteryManagerState().max_hours_to_run = args.max_hours_to_run
-            logger.info(
-                f'>>>>> OVERRIDE max_hours_to_run: {str(BatteryManagerState().max_hours_to_run)}')
+            setattr(state, attr_name, converter(value))
+            logger.info('>>>>> OVERRIDE %s: %s', attr_name, getattr(state, attr_name))
         except (ValueError, TypeError, OverflowError) as e:
-            logger.error(f'ERROR, Invalid max_hours_to_run {str(BatteryManagerState().max_hours_to_run)}, exception: {str(e)}')
-    BatteryManagerState().quiet_mode = args.quiet_mode
+            logger.error('ERROR, Invalid %s: %s', error_name, e)
+    state.quiet_mode = args.quiet_mode
     if args.quiet_mode:
-        BatteryManagerState().logging_mode = LoggingMode.SUPER_QUIET
+        state.logging_mode = LoggingMode.SUPER_QUIET
     else:
-        BatteryManagerState().logging_mode = LoggingMode.VERBOSE
+        state.logging_mode = LoggingMode.VERBOSE
 
     
 def main() -> None:
@@ -1955,14 +2568,17 @@ def main() -> None:
     # log_file = DEFAULT_LOG_FILE
 
     atexit.register(exit_handler)
+    # closes a pooled SMTP connection left open by an exception between send and quit
+    atexit.register(smtp_pool.quit)
     signal.signal(signal.SIGINT, sigint_handler)
 
     parser = init_argparse()
     args = parser.parse_args()
+    state = BatteryManagerState()
 
     # set up default logging
     if args.log_file_name != None:
-        BatteryManagerState().log_file = args.log_file_name
+        state.log_file = args.log_file_name
 
     logger = init_logging()
     # logging_handlers = setup_logging_handlers(BatteryManagerState().log_file)
@@ -1977,27 +2593,33 @@ def main() -> None:
     # logger.debug(f"Test debug")
 
     logger.custom('>>>>> START <<<<<')
-    BatteryManagerState().force_full_charge = args.force_full_charge
+    state.force_full_charge = args.force_full_charge
 
     process_overrides(args)
+    if args.max_concurrent_kasa_rpcs != None:
+        if args.max_concurrent_kasa_rpcs > 0:
+            state.max_concurrent_kasa_rpcs = args.max_concurrent_kasa_rpcs
+            logger.info('>>>>> OVERRIDE max_concurrent_kasa_rpcs: %s', state.max_concurrent_kasa_rpcs)
+        else:
+            logger.error('ERROR, Invalid max_concurrent_kasa_rpcs: %s', args.max_concurrent_kasa_rpcs)
 
-    start_threshold_logger = DebugLogger('start_threshold_logger', level=logging.INFO, active=BatteryManagerState().debug_file_logger_active)
+    start_threshold_logger = DebugLogger('start_threshold_logger', level=logging.INFO, active=state.debug_file_logger_active)
 
     # By here global default values for thresholds are valid so create the DEFAULT one
-    BatteryManagerState().default_config = DeviceConfig(DEFAULT_CONFIG_TAG,
-                                          BatteryManagerState().nominal_charge_start_power_threshold,
-                                          BatteryManagerState().nominal_charge_stop_power_threshold,
-                                          BatteryManagerState().full_charge_power_threshold,
-                                          BatteryManagerState().storage_charge_start_power_threshold,
-                                          BatteryManagerState().storage_charge_stop_power_threshold,
-                                          BatteryManagerState().storage_charge_cycle_limit,
-                                          COARSE_PROBE_THRESHOLD_MARGIN,
-                                          0.0,
-                                          0.0,
-                                          MAX_RUNTIME_HOURS_DEFAULT
-                                          )
-    run_battery_controller(BatteryManagerState().max_hours_to_run,
-                           BatteryManagerState().log_file,
+    state.default_config = DeviceConfig(DEFAULT_CONFIG_TAG,
+                                        state.nominal_charge_start_power_threshold,
+                                        state.nominal_charge_stop_power_threshold,
+                                        state.full_charge_power_threshold,
+                                        state.storage_charge_start_power_threshold,
+                                        state.storage_charge_stop_power_threshold,
+                                        state.storage_charge_cycle_limit,
+                                        COARSE_PROBE_THRESHOLD_MARGIN,
+                                        0.0,
+                                        0.0,
+                                        MAX_RUNTIME_HOURS_DEFAULT
+                                        )
+    run_battery_controller(state.max_hours_to_run,
+                           state.log_file,
                            args.config_file,
                            args.email,
                            args.app_key,
@@ -10,6 +10,8 @@ from math import ceil
 from typing import Set
 import time
 import configparser
+import smtplib
+from email.message import EmailMessage
 
 CONFIG_PATH = './config/'
 LECTRIC_NOMINAL_START_THRESHOLD = 90.0
@@ -354,6 +356,26 @@ def test_verify_config_file():
     assert len(target.BatteryManagerState().plug_manufacturer_map) == 5
     assert target.BatteryManagerState().plug_manufacturer_map['rad_battery_3'] == target.DEFAULT_CONFIG_TAG
 
+def test_load_config_cache(tmp_path):
+    config_file = tmp_path / 'cache_test.config'
+    config_file.write_text('[Plugs]\nbattery_1 = Rad\n')
+    config_parser = target.load_config(str(config_file))
+    assert target.load_config(str(config_file)) is config_parser
+    config_file.write_text('[Plugs]\nbattery_1 = Rad\nbattery_2 = Lectric\n')
+    config_parser = target.load_config(str(config_file))
+    assert len(config_parser['Plugs']) == 2
+
+
+def test_fast_ini_matches_configparser(tmp_path):
+    for config_file in ['config/sample_ebike_battery_manager.config', 'config/ebike_battery_manager.winter.config']:
+        config_parser = configparser.ConfigParser(allow_no_value=True)
+        config_parser.read(config_file)
+        assert target._fast_ini(config_file) == {name: dict(section) for name, section in config_parser.items()}
+    config_file = tmp_path / 'multiline.config'
+    config_file.write_text('[Plugs]\nbattery_1 = Rad\n  Lectric\n')
+    assert target._fast_ini(str(config_file)) is None
+    assert target.load_config(str(config_file))['Plugs']['battery_1'] == 'Rad\nLectric'
+
 @pytest.mark.asyncio
 async def test_battery_plug_exception():
     with patch('kasa.SmartDevice', new_callable=AsyncMock) as mock:
@@ -412,8 +434,7 @@ async def test_scan_for_battery_prefix():
         reset_device_config()
     pass
 
-@pytest.mark.asyncio
-async def test_update_battery_plug_list():
+def test_update_battery_plug_list():
     with patch('kasa.SmartDevice', new_callable=AsyncMock) as mock:
         reset_device_config()
         save_battery_plug_list = target.BatteryManagerState().battery_plug_list
@@ -428,10 +449,10 @@ async def test_update_battery_plug_list():
         assert len(target.BatteryManagerState().battery_plug_list) == 0
         assert target.BatteryManagerState().scan_for_battery_prefix == False
         manufacturer_plug_names = []
-        await target.update_battery_plug_list(mock_smart_device_plug, manufacturer_plug_names)
+        target.update_battery_plug_list(mock_smart_device_plug, manufacturer_plug_names)
         assert len(target.BatteryManagerState().battery_plug_list) == 0
         target.BatteryManagerState().scan_for_battery_prefix = True
-        await target.update_battery_plug_list(mock_smart_device_plug, manufacturer_plug_names)
+        target.update_battery_plug_list(mock_smart_device_plug, manufacturer_plug_names)
         assert len(target.BatteryManagerState().battery_plug_list) == 1
         target.BatteryManagerState().battery_plug_list = []
         result = target.verify_config_file(CONFIG_PATH + 'sample_ebike_battery_manager.config')
@@ -439,7 +460,7 @@ async def test_update_battery_plug_list():
         manufacturer_plug_names = target.BatteryManagerState().plug_manufacturer_map.keys()
         assert mock_smart_device_plug.alias in manufacturer_plug_names
         assert len(target.BatteryManagerState().battery_plug_list) == 0
-        await target.update_battery_plug_list(mock_smart_device_plug, manufacturer_plug_names)
+        target.update_battery_plug_list(mock_smart_device_plug, manufacturer_plug_names)
         assert len(target.BatteryManagerState().battery_plug_list) == 1
         mock_smart_device_strip = mock.return_value
         mock_smart_device_strip.is_plug = False
@@ -451,22 +472,21 @@ async def test_update_battery_plug_list():
         mock_strip_children.append(mock.return_value)
         mock_strip_children[1].alias = 'lectric_battery_2'
         mock_smart_device_strip.children = mock_strip_children
-        await target.update_battery_plug_list(mock_smart_device_strip, manufacturer_plug_names)
+        target.update_battery_plug_list(mock_smart_device_strip, manufacturer_plug_names)
         assert len(target.BatteryManagerState().battery_plug_list) == 3
         target.BatteryManagerState().battery_plug_list = []
         manufacturer_plug_names = []
         target.BatteryManagerState().scan_for_battery_prefix = False
-        await target.update_battery_plug_list(mock_smart_device_strip, manufacturer_plug_names)
+        target.update_battery_plug_list(mock_smart_device_strip, manufacturer_plug_names)
         assert len(target.BatteryManagerState().battery_plug_list) == 0
         target.BatteryManagerState().scan_for_battery_prefix = True
-        await target.update_battery_plug_list(mock_smart_device_strip, manufacturer_plug_names)
+        target.update_battery_plug_list(mock_smart_device_strip, manufacturer_plug_names)
         assert len(target.BatteryManagerState().battery_plug_list) == 2
         target.BatteryManagerState().scan_for_battery_prefix = False
         # Restore original battery_plug_list
         target.BatteryManagerState().battery_plug_list = save_battery_plug_list
 
-@pytest.mark.asyncio
-async def test_update_battery_plug_list_config_name_not_battery():
+def test_update_battery_plug_list_config_name_not_battery():
     with patch('kasa.SmartDevice', new_callable=AsyncMock) as mock:
         reset_device_config()
         plug_manufacturer_map = {}
@@ -488,7 +508,7 @@ async def test_update_battery_plug_list_config_name_not_battery():
         assert mock_smart_device_plug.alias in manufacturer_plug_names
         assert len(target.BatteryManagerState().battery_plug_list) == 0
         assert len(manufacturer_plug_names) == 3
-        await target.update_battery_plug_list(mock_smart_device_plug, manufacturer_plug_names)
+        target.update_battery_plug_list(mock_smart_device_plug, manufacturer_plug_names)
         assert len(target.BatteryManagerState().battery_plug_list) == 1
         mock_smart_device_strip = mock.return_value
         mock_smart_device_strip.is_plug = False
@@ -500,10 +520,81 @@ async def test_update_battery_plug_list_config_name_not_battery():
         mock_strip_children.append(mock.return_value)
         mock_strip_children[1].alias = 'lectric_2'
         mock_smart_device_strip.children = mock_strip_children
-        await target.update_battery_plug_list(mock_smart_device_strip, manufacturer_plug_names)
+        target.update_battery_plug_list(mock_smart_device_strip, manufacturer_plug_names)
         assert len(target.BatteryManagerState().battery_plug_list) == 3
         target.BatteryManagerState().battery_plug_list = save_battery_plug_list
 
+@pytest.mark.asyncio
+async def test_setup_plug():
+    with patch('scripts.ebike_battery_manager.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+        plug = MagicMock()
+        plug.name = 'test_setup_plug'
+        plug.update = AsyncMock()
+        plug.reset_emeter_state = AsyncMock()
+        plug.turn_on = AsyncMock()
+        plug.turn_off = AsyncMock()
+        plug.is_on.return_value = True
+        plug.get_power.return_value = 50.0
+        assert await target.setup_plug(plug) == 0
+        plug.turn_off.assert_not_called()
+        assert plug.update.call_count == 2
+        plug.update.reset_mock()
+        plug.get_power.return_value = 0.0
+        assert await target.setup_plug(plug) == target.PLUG_RETRY_SETUP_LIMIT
+        assert plug.turn_off.call_count == target.PLUG_RETRY_SETUP_LIMIT
+        # one initial update plus one per retry, turn_off() refreshes state itself
+        assert plug.update.call_count == 1 + target.PLUG_RETRY_SETUP_LIMIT
+        # no backoff after the last attempt, the settle sleep plus one delay between each retry
+        delays = [call.args[0] for call in mock_sleep.call_args_list[-target.PLUG_RETRY_SETUP_LIMIT:]]
+        assert delays[0] == target.PLUG_SETTLE_TIME_SECS
+        assert all(2 ** attempt <= delay <= 2 ** attempt + 1 for attempt, delay in enumerate(delays[1:], 1))
+
+@pytest.mark.asyncio
+async def test_kasa_semaphore_bounds_concurrent_rpcs():
+    save_max_concurrent_kasa_rpcs = target.BatteryManagerState().max_concurrent_kasa_rpcs
+    target.BatteryManagerState().max_concurrent_kasa_rpcs = 2
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_update():
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    try:
+        devices = []
+        for _ in range(6):
+            device = MagicMock()
+            device.update = fake_update
+            devices.append(device)
+        await asyncio.gather(*(target.update_device(device) for device in devices))
+        assert max_in_flight == 2
+    finally:
+        target.BatteryManagerState().max_concurrent_kasa_rpcs = save_max_concurrent_kasa_rpcs
+        target._kasa_sem = None
+
+@pytest.mark.asyncio
+async def test_update_device_deduplicates_requests():
+    device = MagicMock()
+    update_ct = 0
+
+    async def fake_update():
+        nonlocal update_ct
+        update_ct += 1
+        await asyncio.sleep(0.01)
+
+    device.update = fake_update
+    # concurrent callers share one request
+    await asyncio.gather(*(target.update_device(device) for _ in range(4)))
+    assert update_ct == 1
+    # a recently refreshed device is not refreshed again unless forced
+    await target.update_device(device)
+    assert update_ct == 1
+    await target.update_device(device, force=True)
+    assert update_ct == 2
+
 def setup_sample_config():
     reset_device_config()
     result = target.verify_config_file(CONFIG_PATH + 'sample_ebike_battery_manager.config')
@@ -732,6 +823,11 @@ def test_delete_plugs():
     plugs_to_delete.append(plug)
     target.delete_plugs(battery_plug_list, plugs_to_delete)
     assert len(battery_plug_list) == 0
+    # plugs not in the list are ignored and the remaining plugs keep their order
+    other_plug = BatteryPlug('test_delete_plugs_other_name', any, max_cycles_in_fine_mode, rad_config)
+    battery_plug_list.extend([strip_plug, other_plug, plug])
+    target.delete_plugs(battery_plug_list, [other_plug, other_plug])
+    assert battery_plug_list == [strip_plug, plug]
 
 def test_start_threshold_check():
     reset_device_config()
@@ -820,6 +916,39 @@ def test_threshold_check():
     assert plug.charge_threshold_close_misses == 4
     target.force_full_charge = False
 
+def test_update_probe_interval():
+    plug = BatteryPlug('test_update_probe_interval', any, max_cycles_in_fine_mode, lectric_config)
+    fine_probe_interval_secs = target.FINE_PROBE_INTERVAL_SECS
+    far_above_threshold = plug.get_active_charge_battery_power_threshold() + \
+        (target.PROBE_BACKOFF_HEADROOM_FACTOR + 1) * lectric_config.coarse_probe_threshold_margin
+    assert plug.probe_interval_secs == target.COARSE_PROBE_INTERVAL_SECS
+    assert plug.update_probe_interval(far_above_threshold, fine_probe_interval_secs) == \
+        int(target.COARSE_PROBE_INTERVAL_SECS * target.PROBE_BACKOFF_MULTIPLIER)
+    for _ in range(10):
+        plug.update_probe_interval(far_above_threshold, fine_probe_interval_secs)
+    assert plug.probe_interval_secs == target.MAX_PROBE_INTERVAL_SECS
+    # within the backoff headroom falls back to the coarse interval
+    assert plug.update_probe_interval(plug.get_coarse_probe_threshold(), fine_probe_interval_secs) == \
+        target.COARSE_PROBE_INTERVAL_SECS
+    plug.fine_mode_active = True
+    assert plug.update_probe_interval(far_above_threshold, fine_probe_interval_secs) == fine_probe_interval_secs
+
+def test_cached_thresholds_follow_mode_and_config():
+    plug = BatteryPlug('test_cached_thresholds', any, max_cycles_in_fine_mode, lectric_config)
+    margin = lectric_config.coarse_probe_threshold_margin
+    assert plug.get_active_charge_battery_power_threshold() == lectric_config.nominal_charge_stop_power_threshold
+    assert plug.get_coarse_probe_threshold() == lectric_config.nominal_charge_stop_power_threshold + margin
+    plug.set_battery_charge_mode(target.BatteryChargeMode.FULL)
+    assert plug.get_active_charge_battery_power_threshold() == lectric_config.full_charge_power_threshold
+    assert plug.get_coarse_probe_threshold() == lectric_config.full_charge_power_threshold + margin
+    plug.set_battery_charge_mode(target.BatteryChargeMode.STORAGE)
+    assert plug.get_active_charge_battery_power_threshold() == lectric_config.storage_charge_stop_power_threshold
+    assert plug.get_coarse_probe_threshold() == lectric_config.storage_charge_stop_power_threshold + margin
+    storage_config = DeviceConfig('Storage', 90.0, 90.0, 5.0, 100.0, 110.0, 1, 15.0, 0.0, 0.0, 12)
+    plug.config = storage_config
+    assert plug.get_active_charge_battery_power_threshold() == 110.0
+    assert plug.get_coarse_probe_threshold() == 125.0
+
 def test_mock_BatteryPlug():
     with patch('scripts.ebike_battery_manager.BatteryPlug') as mock:
         instance = mock.return_value
@@ -956,7 +1085,7 @@ def test_active_plugs():
     target.set_active_plug(BatteryPlug('plug_2', any, max_cycles_in_fine_mode, nominal_thresholds))
     assert len(target.BatteryManagerState().active_plugs) == 2
     time.sleep(1)
-    for active_plug in target.BatteryManagerState().active_plugs:
+    for active_plug in target.BatteryManagerState().active_plugs.values():
         target.stop_active_plug(active_plug.plug.name)
         elapsed_time: datetime = active_plug.stop_time - active_plug.start_time
         assert elapsed_time.seconds > 0
@@ -1054,6 +1183,484 @@ def test_email_send_not_called_with_invalid_file():
         target.send_my_mail('any@gmail.com', 'any_app_key', None)
     assert not mock.called
 
+def test_smtp_pool_reuses_connection():
+    with patch('smtplib.SMTP') as mock_smtp:
+        connection = mock_smtp.return_value
+        connection.noop.return_value = (250, b'OK')
+        pool = target.SmtpPool('smtp.example.com', 587)
+        msg = EmailMessage()
+        msg.set_content('test')
+        pool.send('a@example.com', 'a@example.com', 'key', msg)
+        pool.send('a@example.com', 'a@example.com', 'key', msg)
+        assert mock_smtp.call_count == 1
+        assert connection.login.call_count == 1
+        assert connection.send_message.call_count == 2
+        # a dead connection is replaced
+        connection.noop.side_effect = smtplib.SMTPServerDisconnected()
+        pool.send('a@example.com', 'a@example.com', 'key', msg)
+        assert mock_smtp.call_count == 2
+        pool.quit()
+        connection.quit.assert_called()
+
+@pytest.mark.asyncio
+async def test_wait_for_next_probe():
+    target.wake_event = asyncio.Event()
+    with patch('scripts.ebike_battery_manager.logger'):
+        assert await target.wait_for_next_probe(0.01) == False
+        asyncio.get_running_loop().call_later(0.01, target.request_probe)
+        assert await target.wait_for_next_probe(60) == True
+        assert not target.wake_event.is_set()
+    target.wake_event = None
+
+@pytest.mark.asyncio
+async def test_discover_devices_reuses_previous_discovery():
+    device = MagicMock()
+    device.update = AsyncMock()
+    target._discovered_devices.clear()
+    with patch('scripts.ebike_battery_manager.logger'):
+        with patch('scripts.ebike_battery_manager.Discover.discover', new_callable=AsyncMock) as mock_discover:
+            mock_discover.return_value = {'127.0.0.1': device}
+            assert await target.discover_devices() == {'127.0.0.1': device}
+            assert await target.discover_devices() == {'127.0.0.1': device}
+            assert mock_discover.call_count == 1
+            # a device that no longer responds forces a new discovery
+            device.update.side_effect = OSError('unreachable')
+            target._last_update_times.clear()
+            await target.discover_devices()
+            assert mock_discover.call_count == 2
+    target._discovered_devices.clear()
+
+def test_verify_config_file_cache(tmp_path):
+    config_file = tmp_path / 'cache_test.config'
+    with open(CONFIG_PATH + 'sample_ebike_battery_manager.config', 'r') as f:
+        config_file.write_text(f.read())
+    try:
+        reset_device_config()
+        assert target.verify_config_file(str(config_file)) == True
+        # only the in process memo, nothing is written next to the config file
+        assert [path.name for path in tmp_path.iterdir()] == ['cache_test.config']
+        device_config = dict(target.BatteryManagerState().device_config)
+        plug_manufacturer_map = dict(target.BatteryManagerState().plug_manufacturer_map)
+        plug_storage_list = target.BatteryManagerState().plug_storage_list
+        reset_device_config()
+        # unchanged file, served from BatteryManagerState without parsing it
+        with patch.object(target, 'load_config', side_effect=AssertionError('config file parsed again')):
+            assert target.verify_config_file(str(config_file)) == True
+        assert target.BatteryManagerState().device_config == device_config
+        assert target.BatteryManagerState().plug_manufacturer_map == plug_manufacturer_map
+        assert target.BatteryManagerState().plug_storage_list == plug_storage_list
+        # any change to the file invalidates the memo
+        config_file.write_text(config_file.read_text() + '\n')
+        reset_device_config()
+        with patch.object(target, 'load_config', wraps=target.load_config) as load_config:
+            assert target.verify_config_file(str(config_file)) == True
+            assert load_config.call_count == 1
+    finally:
+        target.BatteryManagerState().verified_config = None
+        reset_device_config()
+
+def test_process_overrides_updates_state():
+    state = target.BatteryManagerState()
+    saved = (state.nominal_charge_stop_power_threshold, state.max_hours_to_run)
+    try:
+        target.process_overrides(Namespace(nominal_charge_cutoff='12.5', max_hours_to_run='7', scan_for_battery_prefix=False, quiet_mode=False))
+        assert state.nominal_charge_stop_power_threshold == 12.5
+        assert state.max_hours_to_run == 7
+    finally:
+        state.nominal_charge_stop_power_threshold, state.max_hours_to_run = saved
+
+def test_buffered_file_handler(tmp_path):
+    log_file = tmp_path / 'buffered.log'
+    handler = target.BufferedFileHandler(str(log_file))
+    test_logger = logging.getLogger('buffered_file_handler_test')
+    test_logger.propagate = False
+    test_logger.setLevel(logging.INFO)
+    test_logger.addHandler(handler)
+    try:
+        test_logger.info('buffered line')
+        assert log_file.read_text() == ''
+        test_logger.warning('flushed line')
+        assert log_file.read_text() == 'buffered line\nflushed line\n'
+    finally:
+        test_logger.removeHandler(handler)
+        handler.close()
+
+def test_shared_event_loop():
+    loop = target.get_event_loop()
+    assert target.get_event_loop() is loop
+    assert loop.run_until_complete(asyncio.sleep(0, result=True)) == True
+    target.close_event_loop()
+    assert loop.is_closed()
+    loop = target.get_event_loop()
+    assert not loop.is_closed()
+    target.close_event_loop()
+
+@pytest.mark.asyncio
+async def test_discover_devices_uses_cached_hosts(tmp_path):
+    state = target.BatteryManagerState()
+    device = MagicMock()
+    device.update = AsyncMock()
+    device.host = '127.0.0.2'
+    device.alias = 'rad_battery_1'
+    device.is_strip = False
+    cache_file = str(tmp_path / 'test.config.hosts')
+    target.save_device_hosts(cache_file, ['127.0.0.2'])
+    target._discovered_devices.clear()
+    target._last_update_times.clear()
+    saved_plug_map = dict(state.plug_manufacturer_map)
+    state.plug_manufacturer_map.clear()
+    state.plug_manufacturer_map['rad_battery_1'] = 'Rad'
+    state.device_host_cache_file = cache_file
+    try:
+        with patch('scripts.ebike_battery_manager.logger'):
+            with patch('scripts.ebike_battery_manager.Discover.discover', new_callable=AsyncMock) as mock_discover:
+                with patch('scripts.ebike_battery_manager.Discover.discover_single', new_callable=AsyncMock) as mock_discover_single:
+                    mock_discover_single.return_value = device
+                    mock_discover.return_value = {'127.0.0.2': device}
+                    assert await target.discover_devices() == {'127.0.0.2': device}
+                    assert mock_discover.call_count == 0
+                    # a configured plug that is not on any cached host forces the broadcast
+                    target._discovered_devices.clear()
+                    state.plug_manufacturer_map['rad_battery_2'] = 'Rad'
+                    await target.discover_devices()
+                    assert mock_discover.call_count == 1
+    finally:
+        state.device_host_cache_file = None
+        state.plug_manufacturer_map.clear()
+        state.plug_manufacturer_map.update(saved_plug_map)
+        target._discovered_devices.clear()
+
+@pytest.mark.asyncio
+async def test_analyze_skips_plugs_not_due():
+    state = target.BatteryManagerState()
+    device = MagicMock()
+    device.update = AsyncMock()
+    device.is_on = True
+    device.emeter_realtime.power = 200.0
+    device.emeter_today = 0.1
+    plug = target.BatteryPlug('due_test_plug', device, 20, target.DeviceConfig('D', 90.0, 90.0, 5.0, 90.0, 90.0, 1, 20.0, 0.0, 0.0, 12))
+    plug.initial_amp_hours = 0
+    saved_plugs = list(state.battery_plug_list)
+    state.battery_plug_list[:] = [plug]
+    try:
+        with patch('scripts.ebike_battery_manager.logger'):
+            with patch('scripts.ebike_battery_manager.start_threshold_logger'):
+                assert await target.analyze() == True
+                assert device.update.await_count == 1
+                assert plug.next_probe_at is not None
+                # not due yet, still counts as charging but is not probed
+                assert await target.analyze() == True
+                assert device.update.await_count == 1
+                assert state.probe_interval_secs <= plug.probe_interval_secs
+                # updates within the coalescing window are shared, start from a clean slate
+                target._last_update_times.clear()
+                assert await target.analyze(probe_all=True) == True
+                assert device.update.await_count == 2
+    finally:
+        state.battery_plug_list[:] = saved_plugs
+        state.active_plugs.pop('due_test_plug', None)
+
+@pytest.mark.asyncio
+async def test_turn_off_plugs_refreshes_each_device_once():
+    strip = MagicMock()
+    strip.update = AsyncMock()
+    children = [MagicMock(), MagicMock(), MagicMock()]
+    for child in children:
+        child.turn_off = AsyncMock()
+        child.is_off = True
+    strip.children = children
+    config = target.DeviceConfig('D', 90.0, 90.0, 5.0, 90.0, 90.0, 1, 20.0, 0.0, 0.0, 12)
+    plugs = [target.BatteryStripPlug(f'strip_plug_{index}', strip, index, 20, config) for index in range(3)]
+    # the last child does not switch off
+    children[2].is_off = False
+    with patch('scripts.ebike_battery_manager.logger'):
+        results = await target.turn_off_plugs(plugs)
+    assert strip.update.await_count == 1
+    assert all(child.turn_off.await_count == 1 for child in children)
+    assert results[:2] == [None, None]
+    assert isinstance(results[2], target.BatteryPlugException)
+
+def test_plug_lists_are_frozensets():
+    state = target.BatteryManagerState()
+    saved = (state.plug_storage_list, state.plug_full_charge_list)
+    try:
+        state.plug_storage_list = ['plug_1', 'plug_2']
+        state.plug_full_charge_list = ('plug_3',)
+        assert state.plug_storage_list == frozenset({'plug_1', 'plug_2'})
+        assert isinstance(state.plug_full_charge_list, frozenset)
+    finally:
+        state.plug_storage_list, state.plug_full_charge_list = saved
+
+def test_update_battery_plug_list_shares_start_time():
+    with patch('kasa.SmartDevice', new_callable=AsyncMock) as mock:
+        reset_device_config()
+        save_battery_plug_list = target.BatteryManagerState().battery_plug_list
+        target.BatteryManagerState().battery_plug_list = []
+        target.BatteryManagerState().scan_for_battery_prefix = True
+        mock_smart_device_strip = mock.return_value
+        mock_smart_device_strip.is_plug = False
+        mock_smart_device_strip.is_strip = True
+        mock_smart_device_strip.alias = 'lectric_strip_1'
+        mock_smart_device_strip.children = [MagicMock(alias='lectric_battery_1'), MagicMock(alias='lectric_battery_2')]
+        try:
+            now = datetime.now() - timedelta(minutes=5)
+            target.update_battery_plug_list(mock_smart_device_strip, [], now)
+            battery_plug_list = target.BatteryManagerState().battery_plug_list
+            assert len(battery_plug_list) == 2
+            assert all(plug.battery_charge_start_time == now for plug in battery_plug_list)
+            target.BatteryManagerState().battery_plug_list = []
+            target.update_battery_plug_list(mock_smart_device_strip, [])
+            battery_plug_list = target.BatteryManagerState().battery_plug_list
+            assert battery_plug_list[0].battery_charge_start_time == battery_plug_list[1].battery_charge_start_time
+        finally:
+            target.BatteryManagerState().scan_for_battery_prefix = False
+            target.BatteryManagerState().battery_plug_list = save_battery_plug_list
+
+@pytest.mark.asyncio
+async def test_discover_all_single_broadcast():
+    device = MagicMock()
+    with patch('scripts.ebike_battery_manager.Discover.discover', new_callable=AsyncMock) as mock_discover:
+        mock_discover.return_value = {'127.0.0.1': device}
+        assert await target.discover_all() == {'127.0.0.1': device}
+        mock_discover.assert_awaited_once_with(discovery_timeout=target.DISCOVERY_TIMEOUT_SECS,
+                                               discovery_packets=target.DISCOVERY_PACKETS)
+    # never shorter than python-kasa's own default
+    assert target.DISCOVERY_TIMEOUT_SECS >= 5
+
+def test_debug_logger_opens_file_only_when_active(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    debug_logger = target.DebugLogger('test_debug_logger', level=logging.INFO)
+    debug_logger.info('not logged')
+    assert not (tmp_path / target.INVESTIGATE_START_CURRENT_FILE).exists()
+    debug_logger = target.DebugLogger('test_debug_logger', level=logging.INFO, active=True)
+    debug_logger.info('logged')
+    debug_logger._debug_logger_file_handler.close()
+    assert 'logged' in (tmp_path / target.INVESTIGATE_START_CURRENT_FILE).read_text()
+
+def test_device_config_threshold_tables():
+    config = DeviceConfig('Storage', 90.0, 80.0, 5.0, 100.0, 110.0, 1, 15.0, 0.0, 0.0, 12)
+    assert config.stop_thresholds == {
+        target.BatteryChargeMode.NOMINAL: 80.0, target.BatteryChargeMode.FULL: 5.0, target.BatteryChargeMode.STORAGE: 110.0}
+    assert config.start_thresholds == {
+        target.BatteryChargeMode.NOMINAL: 90.0, target.BatteryChargeMode.FULL: 5.0, target.BatteryChargeMode.STORAGE: 100.0}
+    plug = BatteryPlug('storage_plug', MagicMock(), 1, config)
+    plug.set_battery_charge_mode(target.BatteryChargeMode.STORAGE)
+    assert plug.get_active_charge_battery_power_threshold() == 110.0
+    assert plug.get_start_power_threshold() == 100.0
+
+@pytest.mark.asyncio
+async def test_wait_for_power():
+    with patch('scripts.ebike_battery_manager.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+        plug = MagicMock()
+        plug.update = AsyncMock()
+        plug.get_power.side_effect = [0.0, 0.0, 45.0]
+        assert await target.wait_for_power(plug) == 45.0
+        assert [call.args[0] for call in mock_sleep.call_args_list] == [0.5, 1.0, 2.0]
+        plug.update.assert_called_with(force=True)
+        mock_sleep.reset_mock()
+        plug.get_power.side_effect = None
+        plug.get_power.return_value = 0.0
+        assert await target.wait_for_power(plug) == 0.0
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        assert sum(delays) == target.PLUG_POWER_POLL_TIMEOUT_SECS
+        assert max(delays) == target.PLUG_POWER_POLL_MAX_SECS
+
+def test_send_my_mail_compresses_large_log(tmp_path):
+    import gzip
+    log_file = tmp_path / 'large.log'
+    line = 'x' * 99 + '\n'
+    log_file.write_text(line * (target.EMAIL_INLINE_LOG_MAX_BYTES // len(line) + 1) + 'FINI\n')
+    with patch('scripts.ebike_battery_manager.send') as mock:
+        target.send_my_mail('any@gmail.com', 'any_app_key', str(log_file))
+    msg = mock.call_args.args[3]
+    attachments = list(msg.iter_attachments())
+    assert len(attachments) == 1
+    assert attachments[0].get_filename() == 'large.log.gz'
+    assert attachments[0].get_content_type() == 'application/gzip'
+    assert gzip.decompress(attachments[0].get_content()) == log_file.read_bytes()
+    # the end of the log is inline, starting on a whole line
+    body = msg.get_body(preferencelist=('plain',)).get_content()
+    assert body.endswith(line + 'FINI\n')
+    assert body.split('End of the log:\n\n', 1)[1].startswith(line)
+    assert len(body) < target.EMAIL_INLINE_LOG_TAIL_BYTES + 200
+    small_log_file = tmp_path / 'small.log'
+    small_log_file.write_text('charged\n')
+    with patch('scripts.ebike_battery_manager.send') as mock:
+        target.send_my_mail('any@gmail.com', 'any_app_key', str(small_log_file))
+    assert mock.call_args.args[3].get_content() == 'charged\n'
+
+@pytest.mark.asyncio
+async def test_analyze_loop_backs_off_between_retries():
+    with patch('scripts.ebike_battery_manager.init', new_callable=AsyncMock) as mock_init:
+        with patch('scripts.ebike_battery_manager.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            mock_init.side_effect = target.BatteryPlugException('no plugs')
+            assert await target.analyze_loop(datetime.now() + timedelta(hours=1)) == False
+    assert mock_init.call_count == target.RETRY_LIMIT
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [
+        target.RETRY_DELAY_SECS, min(2 * target.RETRY_DELAY_SECS, target.RETRY_DELAY_MAX_SECS)]
+
+def test_event_loop_uses_uvloop_when_installed():
+    mock_uvloop = MagicMock()
+    mock_uvloop.new_event_loop.side_effect = asyncio.new_event_loop
+    with patch.object(target, 'uvloop', mock_uvloop):
+        loop = target.get_event_loop()
+        mock_uvloop.new_event_loop.assert_called_once()
+        target.close_event_loop()
+    assert loop.is_closed()
+
+def test_logging_runs_through_queue_listener():
+    root_logger = logging.getLogger()
+    assert target._log_listener is not None
+    assert target._log_queue_handler in root_logger.handlers
+    file_handlers = [handler for handler in target._log_listener.handlers if isinstance(handler, target.BufferedFileHandler)]
+    assert len(file_handlers) == 1
+    assert file_handlers[0] not in root_logger.handlers
+    root_logger.info('queued record')
+    target.flush_log_handlers()
+    with open(file_handlers[0].baseFilename) as f:
+        assert 'queued record' in f.read()
+
+def test_event_loop_uses_eager_task_factory_when_available():
+    eager_task_factory = MagicMock()
+    with patch.object(target.asyncio, 'eager_task_factory', eager_task_factory, create=True):
+        loop = target.get_event_loop()
+        assert loop.get_task_factory() is eager_task_factory
+        loop.set_task_factory(None)
+        target.close_event_loop()
+
+def test_exit_handler_runs_shutdown_on_shared_loop():
+    with patch.object(target, 'shutdown_plugs', new_callable=AsyncMock) as mock_shutdown:
+        loop = target.get_event_loop()
+        target.exit_handler()
+        mock_shutdown.assert_awaited_once()
+    assert loop.is_closed()
+
+def test_log_actively_charging_plugs_unknown_duration():
+    plug = MagicMock()
+    plug.plug.get_power_total.return_value = 2.0
+    plug.plug.total_amp_hours = 2.0
+    plug.plug.name = 'Plug1'
+    plug.start_time = None
+    plug.stop_time = None
+    with patch('scripts.ebike_battery_manager.logger') as mock_logger:
+        with patch('scripts.ebike_battery_manager.start_threshold_logger') as mock_start_threshold_logger:
+            target.log_actively_charging_plugs({plug})
+    mock_logger.info.assert_any_call('    Plug1, charged for unknown duration')
+    mock_start_threshold_logger.info.assert_any_call('    Plug1, charged for unknown duration')
+    mock_logger.error.assert_not_called()
+
+def test_log_start_state_one_record_per_manufacturer():
+    state = target.BatteryManagerState()
+    saved_device_config, saved_logging_mode, saved_default_config = state.device_config, state.logging_mode, state.default_config
+    state.logging_mode = target.LoggingMode.VERBOSE
+    state.default_config = target.DeviceConfig(target.DEFAULT_CONFIG_TAG, 90.0, 90.0, 5.0, 90.0, 90.0, 1, 20.0, 0.0, 0.0, 12)
+    state.device_config = {'D': target.DeviceConfig('D', 90.0, 90.0, 5.0, 90.0, 90.0, 1, 20.0, 0.0, 0.0, 12)}
+    try:
+        with patch('scripts.ebike_battery_manager.logger') as mock_logger:
+            target.log_start_state(max_hours_to_run=8, log_file='x.log', config_file='x.config',
+                                   test_mode=False, config_file_is_valid=True)
+    finally:
+        state.device_config, state.logging_mode, state.default_config = saved_device_config, saved_logging_mode, saved_default_config
+    manufacturer_calls = [call for call in mock_logger.info.call_args_list
+                          if call.args[0].startswith('  ---- manufacturer:')]
+    assert len(manufacturer_calls) == 1
+    assert manufacturer_calls[0].args[1] == 'D'
+    lines = (manufacturer_calls[0].args[0] % manufacturer_calls[0].args[1:]).split('\n')
+    assert len(lines) == 12
+    assert lines[0] == '  ---- manufacturer: D'
+    assert '  -------- charger_amp_hour_rate: N/A' in lines
+
+def test_battery_strip_plug_looks_up_child_once():
+    strip = MagicMock()
+    child = MagicMock()
+    child.emeter_today = 0.0
+    child.is_on = True
+    children = MagicMock()
+    children.__getitem__.return_value = child
+    strip.children = children
+    config = target.DeviceConfig('D', 90.0, 90.0, 5.0, 90.0, 90.0, 1, 20.0, 0.0, 0.0, 12)
+    plug = target.BatteryStripPlug('strip_plug_1', strip, 1, 20, config)
+    # the child is not looked up until it is used
+    children.__getitem__.assert_not_called()
+    assert plug.is_on()
+    plug.initial_amp_hours = 0.0
+    assert plug.get_power_total() == 0.0
+    children.__getitem__.assert_called_once_with(1)
+
+def test_flush_log_handlers_keeps_listener_thread():
+    assert target._log_listener is not None
+    listener_thread = target._log_listener._thread
+    with patch.object(target._log_listener, 'stop', side_effect=AssertionError('listener restarted')):
+        logging.getLogger().info('flushed without a restart')
+        target.flush_log_handlers()
+    assert target._log_listener._thread is listener_thread
+    file_handlers = [handler for handler in target._log_listener.handlers if isinstance(handler, target.BufferedFileHandler)]
+    with open(file_handlers[0].baseFilename) as f:
+        assert 'flushed without a restart' in f.read()
+
+def test_verify_config_file_keeps_manufacturers_parsed_before_an_error(tmp_path):
+    config_file = tmp_path / 'partial.config'
+    config_file.write_text('[Rad]\n'
+                           'nominal_charge_stop_power_threshold = 90.0\n'
+                           'full_charge_power_threshold = 5.0\n'
+                           'coarse_probe_threshold_margin = 20.0\n'
+                           '\n'
+                           '[Lectric]\n'
+                           'nominal_charge_stop_power_threshold = 80.0\n'
+                           'full_charge_power_threshold = not_a_number\n'
+                           'coarse_probe_threshold_margin = 20.0\n')
+    try:
+        reset_device_config()
+        assert target.verify_config_file(str(config_file)) == False
+        device_config = target.BatteryManagerState().device_config
+        assert device_config['Rad'].nominal_charge_stop_power_threshold == 90.0
+        assert 'Lectric' not in device_config
+        # a failed parse is not memoized
+        assert target.BatteryManagerState().verified_config is None
+    finally:
+        target.BatteryManagerState().verified_config = None
+        reset_device_config()
+
+@pytest.mark.asyncio
+async def test_setup_cancels_other_plugs_on_failure():
+    failing_plug = MagicMock()
+    failing_plug.name = 'failing_plug'
+    failing_plug.update = AsyncMock()
+    failing_plug.reset_emeter_state = AsyncMock()
+    failing_plug.is_on.return_value = False
+
+    async def fail_turn_on():
+        await asyncio.sleep(0)
+        raise target.BatteryPlugException('FATAL ERROR, unable to turn on plug: failing_plug')
+    failing_plug.turn_on = fail_turn_on
+
+    sibling_cancelled = asyncio.Event()
+    sibling_plug = MagicMock()
+    sibling_plug.name = 'sibling_plug'
+    sibling_plug.update = AsyncMock()
+    sibling_plug.reset_emeter_state = AsyncMock()
+    sibling_plug.is_on.return_value = False
+
+    async def slow_turn_on():
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            sibling_cancelled.set()
+            raise
+    sibling_plug.turn_on = slow_turn_on
+
+    state = target.BatteryManagerState()
+    save_battery_plug_list = state.battery_plug_list
+    state.battery_plug_list = [sibling_plug, failing_plug]
+    try:
+        with patch('scripts.ebike_battery_manager.PLUG_SETTLE_TIME_SECS', 0):
+            with pytest.raises(target.BatteryPlugException):
+                await target.setup()
+    finally:
+        state.battery_plug_list = save_battery_plug_list
+    assert sibling_cancelled.is_set()
+    assert [task for task in asyncio.all_tasks() if task is not asyncio.current_task()] == []
+
 if __name__ == "__main__":
     # test_foo()
-    print('Everything passed')
\ No newline at end of file
+    print('Everything passed')